@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark POST /api/profiles/import with a generated CSV (default 100k
+rows), reporting rows per second and the process's peak RSS growth.
+
+The app runs in-process over httpx's ASGI transport against the MongoDB
+given by MONGO_URL. That transport buffers the request body, so the RSS
+figure includes one copy of the uploaded file.
+
+Usage: MONGO_URL=mongodb://localhost:27017 python backend/benchmarks/bench_import.py [--rows 100000]
+"""
+
+import asyncio
+import argparse
+import csv
+import resource
+import secrets
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+
+import httpx
+
+import common  # noqa: F401  (points DB_NAME at the benchmark database)
+
+import server
+
+
+def write_csv(path: str, rows: int, invalid_every: int):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["name", "job", "phone", "whatsapp", "website", "instagram"])
+        for i in range(rows):
+            # Leave the phone empty on some rows to exercise the error report.
+            phone = "" if invalid_every and i % invalid_every == 0 else f"+3360000{i:05d}"
+            writer.writerow([f"Employé {i}", "Conseiller", phone, phone, "https://example.com", f"@employe{i}"])
+
+
+async def seed_session(db) -> str:
+    now = datetime.now(timezone.utc)
+    token = secrets.token_urlsafe(32)
+    await db.users.insert_one({
+        "user_id": "user_benchimport",
+        "email": "bench-import@example.com",
+        "name": "Bench Import",
+        "picture": None,
+        "created_at": now
+    })
+    await db.user_sessions.insert_one({
+        "user_id": "user_benchimport",
+        "session_token": token,
+        "expires_at": now + timedelta(days=1),
+        "created_at": now
+    })
+    return token
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--invalid-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    server.connect_db()
+    db = server.db
+    for collection in ("users", "user_sessions", "profiles"):
+        await db[collection].drop()
+    await server.ensure_indexes()
+    token = await seed_session(db)
+
+    with tempfile.NamedTemporaryFile(suffix=".csv") as source:
+        write_csv(source.name, args.rows, args.invalid_every)
+        rss_before = peak_rss_mb()
+
+        http = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=server.app),
+            base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=None
+        )
+        try:
+            with open(source.name, "rb") as upload:
+                started = time.perf_counter()
+                response = await http.post(
+                    "/api/profiles/import",
+                    files={"file": ("profiles.csv", upload, "text/csv")}
+                )
+                elapsed = time.perf_counter() - started
+        finally:
+            await http.aclose()
+
+    report = response.json()
+    stored = await db.profiles.count_documents({"user_id": "user_benchimport"})
+    print(f"status {response.status_code}: {report['inserted']} inserted, {report['failed']} failed, {stored} stored")
+    print(f"{args.rows} rows in {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s)")
+    print(f"peak RSS growth during import: {peak_rss_mb() - rss_before:.1f} MB")
+
+    for collection in ("users", "user_sessions", "profiles"):
+        await db[collection].drop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
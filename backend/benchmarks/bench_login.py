@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the latency of a cheap endpoint (GET /internal/stats)
+while a storm of concurrent POST /api/auth/login requests is running.
+
+The storm is run twice: with bcrypt inline on the event loop (the shape of
+the old hash_password/verify_password calls) and through the bounded
+password pool used by login. With the pool, the cheap endpoint's latency
+should stay close to its idle baseline.
+
+Usage: MONGO_URL=mongodb://localhost:27017 python backend/benchmarks/bench_login.py
+"""
+
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+import httpx
+
+from common import measure, print_results
+
+import server
+
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench-password"
+
+
+async def seed(db):
+    await db.users.insert_one({
+        "user_id": "user_benchlogin0",
+        "email": EMAIL,
+        "name": "Bench Login",
+        "password": server.bcrypt_hash(PASSWORD),
+        "picture": None,
+        "created_at": datetime.now(timezone.utc)
+    })
+
+
+async def inline_password_job(func, *args):
+    return func(*args)
+
+
+async def login_storm(http: httpx.AsyncClient, concurrency: int, stop: asyncio.Event):
+    async def worker():
+        while not stop.is_set():
+            await http.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def probe_during_storm(http, name: str, concurrency: int, iterations: int) -> dict:
+    stop = asyncio.Event()
+    storm = asyncio.create_task(login_storm(http, concurrency, stop))
+    try:
+        return await measure(name, lambda: http.get("/internal/stats"), iterations, warmup=5)
+    finally:
+        stop.set()
+        await storm
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    server.connect_db()
+    db = server.db
+    await db.users.drop()
+    await db.user_sessions.drop()
+    await seed(db)
+
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench")
+    pooled_job = server.run_password_job
+    try:
+        results = [await measure("stats, idle", lambda: http.get("/internal/stats"), args.iterations)]
+
+        server.run_password_job = inline_password_job
+        results.append(await probe_during_storm(http, "stats, login storm, inline bcrypt",
+                                                args.concurrency, args.iterations))
+
+        server.run_password_job = pooled_job
+        results.append(await probe_during_storm(http, "stats, login storm, password pool",
+                                                args.concurrency, args.iterations))
+        print_results(results)
+    finally:
+        server.run_password_job = pooled_job
+        await http.aclose()
+        await db.users.drop()
+        await db.user_sessions.drop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Load-test the OAuth session lookup against a local stub of the upstream
+session-data endpoint: a fresh httpx.AsyncClient per call (the former
+exchange_session code) against the shared pooled client behind
+fetch_oauth_session.
+
+The stub counts accepted TCP connections, so the output shows how many
+handshakes each variant paid for. No MongoDB is needed.
+
+Usage: python backend/benchmarks/bench_oauth.py [--concurrency 16]
+"""
+
+import asyncio
+import argparse
+import json
+
+import httpx
+
+from common import run_concurrent, print_results
+
+import server
+
+
+SESSION_BODY = json.dumps({
+    "email": "bench@example.com",
+    "name": "Bench",
+    "picture": None,
+    "session_token": "bench-token"
+}).encode()
+
+
+class StubUpstream:
+    """Minimal HTTP/1.1 keep-alive server answering every request with SESSION_BODY"""
+
+    def __init__(self):
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(SESSION_BODY)).encode() + b"\r\n\r\n" + SESSION_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+async def fresh_client_lookup(session_id: str):
+    async with httpx.AsyncClient() as http:
+        resp = await http.get(server.OAUTH_SESSION_URL, headers={"X-Session-ID": session_id})
+        return resp.json()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    stub = StubUpstream()
+    upstream = await asyncio.start_server(stub.handle, "127.0.0.1", 0)
+    port = upstream.sockets[0].getsockname()[1]
+    server.OAUTH_SESSION_URL = f"http://127.0.0.1:{port}/auth/v1/env/oauth/session-data"
+
+    results = []
+    connections = []
+    try:
+        for name, func in (
+            ("fresh AsyncClient per call", fresh_client_lookup),
+            ("shared pooled client", server.fetch_oauth_session),
+        ):
+            before = stub.connections
+            results.append(await run_concurrent(name, lambda i: func(f"session-{i}"), args.requests, args.concurrency))
+            connections.append((name, stub.connections - before))
+    finally:
+        if server.oauth_http is not None:
+            await server.oauth_http.aclose()
+        upstream.close()
+        await upstream.wait_closed()
+
+    print_results(results)
+    print()
+    for name, count in connections:
+        print(f"{name:<40} {count:>7} TCP connections for {args.requests} lookups")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
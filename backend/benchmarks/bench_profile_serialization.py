@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark GET /profiles response building over 1k and 10k profile
+documents: the former path (Profile(**doc) per document, then FastAPI's
+response_model validation and JSON encoding of a ProfilePage) against
+the fast path (profile_payload + orjson through FastJSONResponse).
+
+Runs entirely in memory; no MongoDB is needed.
+
+Usage: python backend/benchmarks/bench_profile_serialization.py [--iterations 20]
+"""
+
+import asyncio
+import argparse
+from datetime import datetime, timezone, timedelta
+
+from fastapi.routing import serialize_response
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+
+from common import measure, print_results
+
+import server
+
+
+def make_docs(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [{
+        "profile_id": f"profile_{i:012d}",
+        "user_id": "user_bench",
+        "name": f"Employé {i}",
+        "job": "Conseiller",
+        "phone": f"+3360000{i:05d}",
+        "whatsapp": f"+3360000{i:05d}",
+        "website": "https://example.com",
+        "address": "1 rue de la Paix, Paris",
+        "instagram": f"@employe{i}",
+        "photo_url": f"https://example.com/api/uploads/{i:064x}.png",
+        "primary_color": "#3B82F6",
+        "secondary_color": "#8B5CF6",
+        "unique_link": f"employe-{i}-{i:08x}",
+        "is_archived": False,
+        "subscription_start": now,
+        "next_renewal_at": now + timedelta(days=365),
+        "created_at": now,
+        "updated_at": now
+    } for i in range(count)]
+
+
+PAGE_FIELD = create_response_field(name="response", type_=server.ProfilePage)
+
+
+async def pydantic_path(docs: list) -> bytes:
+    page = server.ProfilePage(
+        profiles=[server.Profile(**server.coerce_dates(dict(d), "profiles")) for d in docs],
+        next_cursor=None
+    )
+    content = await serialize_response(field=PAGE_FIELD, response_content=page)
+    return JSONResponse(content).body
+
+
+async def fast_path(docs: list) -> bytes:
+    return server.FastJSONResponse({
+        "profiles": [server.profile_payload(dict(d)) for d in docs],
+        "next_cursor": None
+    }).body
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for count in (1000, 10000):
+        docs = make_docs(count)
+        results.append(await measure(f"Profile + response_model, {count}", lambda: pydantic_path(docs),
+                                     args.iterations, warmup=2))
+        results.append(await measure(f"profile_payload + orjson, {count}", lambda: fast_path(docs),
+                                     args.iterations, warmup=2))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark session resolution: the former two-query path
+(user_sessions.find_one then users.find_one) against the single
+$lookup aggregation used by get_user_from_token on a cache miss.
+
+Usage: MONGO_URL=mongodb://localhost:27017 python backend/benchmarks/bench_session_lookup.py
+"""
+
+import asyncio
+import argparse
+import secrets
+from datetime import datetime, timezone, timedelta
+
+from common import measure, print_results
+
+import server
+
+
+async def seed(db, users: int) -> list:
+    now = datetime.now(timezone.utc)
+    tokens = []
+    user_docs = []
+    session_docs = []
+    for i in range(users):
+        user_id = f"user_bench{i:07d}"
+        token = secrets.token_urlsafe(32)
+        tokens.append(token)
+        user_docs.append({
+            "user_id": user_id,
+            "email": f"bench{i}@example.com",
+            "name": f"Bench {i}",
+            "picture": None,
+            "created_at": now
+        })
+        session_docs.append({
+            "user_id": user_id,
+            "session_token": token,
+            "expires_at": now + timedelta(days=7),
+            "created_at": now
+        })
+    await db.users.insert_many(user_docs)
+    await db.user_sessions.insert_many(session_docs)
+    await db.users.create_index("user_id", unique=True)
+    await db.user_sessions.create_index("session_token", unique=True)
+    return tokens
+
+
+async def two_queries(db, token: str):
+    session_doc = await db.user_sessions.find_one({"session_token": token}, {"_id": 0})
+    return await db.users.find_one({"user_id": session_doc["user_id"]}, {"_id": 0})
+
+
+async def single_lookup(db, token: str):
+    docs = await db.user_sessions.aggregate(server.session_user_pipeline(token)).to_list(1)
+    return docs[0]["user"]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    server.connect_db()
+    db = server.db
+    await db.users.drop()
+    await db.user_sessions.drop()
+    tokens = await seed(db, args.users)
+
+    def picker():
+        return tokens[secrets.randbelow(len(tokens))]
+
+    results = [
+        await measure("two queries (find_one x2)", lambda: two_queries(db, picker()), args.iterations),
+        await measure("single $lookup aggregation", lambda: single_lookup(db, picker()), args.iterations),
+    ]
+    print_results(results)
+
+    await db.users.drop()
+    await db.user_sessions.drop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
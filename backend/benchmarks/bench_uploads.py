@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/uploads/{file_id}: the former exists() + bare
+FileResponse handler against get_upload, for full downloads,
+conditional revalidation (304) and byte-range requests.
+
+Both handlers run in-process over httpx's ASGI transport, so no MongoDB
+or network is involved.
+
+Usage: python backend/benchmarks/bench_uploads.py [--size-kb 2048]
+"""
+
+import asyncio
+import argparse
+import secrets
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse
+
+from common import measure, print_results
+
+import server
+
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/api/uploads/{file_id}")
+async def legacy_get_upload(file_id: str):
+    file_path = server.UPLOADS_DIR / file_id
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="Fichier non trouvé")
+    return FileResponse(file_path)
+
+
+async def fetch(http: httpx.AsyncClient, url: str, headers: dict = None, expected: int = 200):
+    response = await http.get(url, headers=headers)
+    assert response.status_code == expected, response.status_code
+    return response
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-kb", type=int, default=2048)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    file_id = f"bench-{secrets.token_hex(8)}.jpg"
+    file_path = server.UPLOADS_DIR / file_id
+    file_path.write_bytes(secrets.token_bytes(args.size_kb * 1024))
+    url = f"/api/uploads/{file_id}"
+
+    legacy = httpx.AsyncClient(transport=httpx.ASGITransport(app=legacy_app), base_url="http://bench")
+    current = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench")
+    try:
+        etag = (await fetch(current, url)).headers["etag"]
+        results = [
+            await measure("legacy: full GET", lambda: fetch(legacy, url), args.iterations),
+            await measure("get_upload: full GET", lambda: fetch(current, url), args.iterations),
+            await measure("get_upload: If-None-Match (304)",
+                          lambda: fetch(current, url, {"If-None-Match": etag}, 304), args.iterations),
+            await measure("legacy: Range 64 KiB (full body)",
+                          lambda: fetch(legacy, url, {"Range": "bytes=0-65535"}), args.iterations),
+            await measure("get_upload: Range 64 KiB (206)",
+                          lambda: fetch(current, url, {"Range": "bytes=0-65535"}, 206), args.iterations),
+        ]
+        print_results(results)
+    finally:
+        await legacy.aclose()
+        await current.aclose()
+        file_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
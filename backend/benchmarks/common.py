@@ -0,0 +1,81 @@
+"""
+Shared helpers for the backend benchmarks.
+
+Benchmarks talk to the MongoDB given by MONGO_URL (a throwaway database
+named by BENCH_DB_NAME, default "jpm_bench") and import the FastAPI app
+from backend/server.py.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import statistics
+from pathlib import Path
+from typing import Callable, Awaitable, List, Dict
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+# Benchmarks drop and reseed collections, so never point them at DB_NAME.
+os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "jpm_bench")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, samples: List[float], elapsed: float) -> Dict:
+    """Summarize latency samples (seconds) into a result row in milliseconds"""
+    return {
+        "name": name,
+        "count": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+async def measure(name: str, func: Callable[[], Awaitable], iterations: int, warmup: int = 20) -> Dict:
+    """Run an async callable sequentially and return its latency summary"""
+    for _ in range(warmup):
+        await func()
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - t0)
+    return summarize(name, samples, time.perf_counter() - started)
+
+
+async def run_concurrent(name: str, func: Callable[[int], Awaitable], requests: int, concurrency: int) -> Dict:
+    """Call func(i) for i in range(requests) from `concurrency` workers and
+    return the latency summary; throughput is over the whole run"""
+    samples = []
+    pending = iter(range(requests))
+
+    async def worker():
+        for i in pending:
+            t0 = time.perf_counter()
+            await func(i)
+            samples.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, samples, time.perf_counter() - started)
+
+
+def print_results(results: List[Dict]):
+    print(f"{'benchmark':<40} {'n':>7} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in results:
+        print(f"{row['name']:<40} {row['count']:>7} {row['throughput_rps']:>10} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
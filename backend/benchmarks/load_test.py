@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+In-process load test for the backend: runs server.app over httpx's ASGI
+transport and drives concurrent scenarios against it.
+
+    taps        GET  /api/profiles/public/{unique_link}  (NFC tap bursts)
+    dashboard   GET  /api/profiles?limit=100             (authenticated listing)
+    creates     POST /api/profiles/import                (bulk creates, JSONL batches)
+    uploads     POST /api/upload                         (small distinct PNGs)
+
+Data lives in the MongoDB given by MONGO_URL (database BENCH_DB_NAME), or
+in an in-memory mongomock-motor database with --mongomock. Uploads are
+written to a temporary directory.
+
+Each scenario reports p50/p95/p99 latency and throughput. --output writes
+the results as JSON; --baseline compares the run with an earlier one and
+exits non-zero when a scenario's p95 regressed by more than --tolerance.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python backend/benchmarks/load_test.py --output run.json
+    python backend/benchmarks/load_test.py --mongomock --baseline run.json
+"""
+
+import asyncio
+import argparse
+import io
+import json
+import platform
+import secrets
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+from common import run_concurrent, print_results, BACKEND_DIR
+
+import server
+
+
+USER_ID = "user_loadtest00"
+COLLECTIONS = ("users", "user_sessions", "profiles", "uploads") + tuple(server.TAP_ROLLUPS.values())
+
+
+def use_mongomock():
+    from mongomock_motor import AsyncMongoMockClient
+
+    server.client = AsyncMongoMockClient()
+    server.db = server.client[server.os.environ["DB_NAME"]]
+
+
+async def seed(db, profiles: int) -> tuple:
+    for collection in COLLECTIONS:
+        await db[collection].drop()
+    await server.ensure_indexes()
+
+    now = datetime.now(timezone.utc)
+    token = secrets.token_urlsafe(32)
+    await db.users.insert_one({
+        "user_id": USER_ID,
+        "email": "loadtest@example.com",
+        "name": "Load Test",
+        "picture": None,
+        "created_at": now
+    })
+    await db.user_sessions.insert_one({
+        "user_id": USER_ID,
+        "session_token": token,
+        "expires_at": now + timedelta(days=1),
+        "created_at": now
+    })
+
+    profile_docs = [
+        server.new_profile_doc(USER_ID, server.ProfileCreate(name=f"Carte {i}", job="Conseiller", phone=f"+336{i:08d}"), now)
+        for i in range(profiles)
+    ]
+    await server.insert_profiles(profile_docs)
+    return token, [doc["unique_link"] for doc in profile_docs]
+
+
+def png_bytes(i: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (i % 256, (i // 256) % 256, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def jsonl_batch(i: int, rows: int) -> bytes:
+    return b"".join(
+        json.dumps({"name": f"Import {i}-{r}", "job": "Commercial", "phone": f"+331{r:08d}"}).encode() + b"\n"
+        for r in range(rows)
+    )
+
+
+async def checked(response_future, expected: int = 200):
+    response = await response_future
+    if response.status_code != expected:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path}: {response.status_code}")
+    return response
+
+
+def scenarios(http: httpx.AsyncClient, links: list, args) -> list:
+    return [
+        ("taps", args.taps, args.tap_concurrency,
+         lambda i: checked(http.get(f"/api/profiles/public/{links[i % len(links)]}"))),
+        ("dashboard", args.dashboard, args.concurrency,
+         lambda i: checked(http.get("/api/profiles", params={"limit": 100}))),
+        ("creates", args.creates, args.concurrency,
+         lambda i: checked(http.post("/api/profiles/import", files={
+             "file": ("batch.jsonl", jsonl_batch(i, args.create_batch), "application/x-ndjson")
+         }))),
+        ("uploads", args.uploads, args.concurrency,
+         lambda i: checked(http.post("/api/upload", files={"file": (f"photo{i}.png", png_bytes(i), "image/png")}))),
+    ]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: list, baseline_path: str, tolerance: float) -> int:
+    baseline = {row["name"]: row for row in json.loads(Path(baseline_path).read_text())["results"]}
+    regressions = 0
+    print(f"\n{'scenario':<40} {'base p95':>9} {'p95':>9} {'change':>8}")
+    for row in results:
+        base = baseline.get(row["name"])
+        if not base or not base["p95_ms"]:
+            continue
+        change = row["p95_ms"] / base["p95_ms"] - 1
+        flag = "  REGRESSION" if change > tolerance else ""
+        regressions += bool(flag)
+        print(f"{row['name']:<40} {base['p95_ms']:>9} {row['p95_ms']:>9} {change:>+8.1%}{flag}")
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongomock", action="store_true", help="use an in-memory mongomock-motor database")
+    parser.add_argument("--profiles", type=int, default=500)
+    parser.add_argument("--taps", type=int, default=5000)
+    parser.add_argument("--tap-concurrency", type=int, default=64)
+    parser.add_argument("--dashboard", type=int, default=500)
+    parser.add_argument("--creates", type=int, default=50)
+    parser.add_argument("--create-batch", type=int, default=100)
+    parser.add_argument("--uploads", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 increase over the baseline")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        use_mongomock()
+    else:
+        server.connect_db()
+
+    uploads_dir = tempfile.TemporaryDirectory()
+    server.UPLOADS_DIR = Path(uploads_dir.name)
+
+    token, links = await seed(server.db, args.profiles)
+    http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.app),
+        base_url="http://loadtest",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=None
+    )
+
+    results = []
+    try:
+        for name, requests, concurrency, func in scenarios(http, links, args):
+            if args.only and name not in args.only:
+                continue
+            results.append(await run_concurrent(name, func, requests, concurrency))
+            results[-1]["concurrency"] = concurrency
+    finally:
+        await http.aclose()
+        for task in list(server.variant_tasks):
+            task.cancel()
+        if server.image_pool is not None:
+            server.image_pool.shutdown(wait=True, cancel_futures=True)
+        for collection in COLLECTIONS:
+            await server.db[collection].drop()
+        uploads_dir.cleanup()
+
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "backend": "mongomock" if args.mongomock else "mongod",
+            "python": platform.python_version(),
+            "params": vars(args),
+            "results": results
+        }, indent=2))
+
+    if args.baseline:
+        return 1 if compare(results, args.baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,58 @@
+"""
+Image variant rendering for uploads.
+
+Runs inside the server's process pool, so it only depends on Pillow and
+the standard library and is cheap to import in a fresh worker.
+"""
+
+from pathlib import Path
+from typing import Iterable, List, Dict
+
+from PIL import Image, ImageOps
+
+VARIANT_FORMATS = {
+    "webp": "WEBP",
+    "jpeg": "JPEG"
+}
+
+def variant_file_id(stem: str, size: int, fmt: str) -> str:
+    return f"{stem}-{size}.{fmt}"
+
+def flatten(image: Image.Image) -> Image.Image:
+    """Drop transparency onto a white background for formats without alpha"""
+    if image.mode == "RGB":
+        return image
+    rgba = image.convert("RGBA")
+    background = Image.new("RGB", rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel("A"))
+    return background
+
+def render_variants(source: str, destination: str, stem: str, sizes: Iterable[int], quality: int) -> List[Dict]:
+    """Write every size/format variant of source into destination.
+
+    Images are never upscaled. Each file is written under a temporary
+    name and renamed, so a variant is either complete or absent.
+    """
+    destination_dir = Path(destination)
+    variants = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+        for size in sizes:
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for fmt, pil_format in VARIANT_FORMATS.items():
+                frame = flatten(resized) if pil_format == "JPEG" else resized
+                file_id = variant_file_id(stem, size, fmt)
+                temp_path = destination_dir / f".{file_id}.tmp"
+                frame.save(temp_path, pil_format, quality=quality)
+                temp_path.replace(destination_dir / file_id)
+                variants.append({
+                    "size": size,
+                    "format": fmt,
+                    "file_id": file_id,
+                    "width": frame.width,
+                    "height": frame.height
+                })
+    return variants
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Management commands for the JPM backend.
+
+Usage:
+    python manage.py indexes            Create missing indexes and report query plans
+    python manage.py dedupe-sessions    Remove duplicate session tokens, keeping the latest expiry
+    python manage.py migrate-dates      Convert ISO-string timestamps to BSON dates
+    python manage.py backfill-renewals  Set next_renewal_at on profiles missing it
+    python manage.py rebuild-rollups    Recompute daily/monthly tap rollups from hourly counts
+    python manage.py sweep              Delete expired sessions and orphaned uploads once
+    python manage.py render-variants    Render image variants still pending or failed
+"""
+
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+import server
+
+INDEXED_QUERIES = [
+    ("users", {"email": "user@example.com"}),
+    ("users", {"user_id": "user_000000000000"}),
+    ("user_sessions", {"session_token": "token"}),
+    ("profiles", {"unique_link": "jean-dupont-0000abcd"}),
+    ("profiles", {"profile_id": "profile_000000000000"}),
+    ("profiles", {"profile_id": "profile_000000000000", "user_id": "user_000000000000"}),
+    ("profiles", {"user_id": "user_000000000000"}),
+    ("profiles", {"user_id": "user_000000000000", "is_archived": True}),
+    ("profiles", {"user_id": "user_000000000000", "created_at": {"$gt": datetime(2000, 1, 1, tzinfo=timezone.utc)}}),
+    ("profiles", {"user_id": "user_000000000000", "is_archived": False, "next_renewal_at": {"$lte": datetime(2000, 1, 1, tzinfo=timezone.utc)}}),
+    ("uploads", {"sha256": "0" * 64}),
+    ("taps_hourly", {"profile_id": "profile_000000000000", "bucket": {"$gte": datetime(2000, 1, 1, tzinfo=timezone.utc)}}),
+    ("taps_daily", {"user_id": "user_000000000000", "bucket": {"$gte": datetime(2000, 1, 1, tzinfo=timezone.utc)}})
+]
+
+def plan_stages(plan: dict) -> list:
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+async def explain_query(collection: str, query: dict) -> dict:
+    result = await server.db.command({
+        "explain": {"find": collection, "filter": query},
+        "verbosity": "queryPlanner"
+    })
+    winning_plan = result["queryPlanner"]["winningPlan"]
+    stages = plan_stages(winning_plan.get("queryPlan", winning_plan))
+    return {
+        "collection": collection,
+        "query": query,
+        "stages": stages,
+        "indexed": "COLLSCAN" not in stages
+    }
+
+async def indexes_command(args) -> int:
+    failed = await server.ensure_indexes()
+    for collection, name in failed:
+        print(f"FAIL {collection}.{name}")
+    if ("user_sessions", "session_token_unique") in failed:
+        print("duplicate session tokens? run \"manage.py dedupe-sessions\", then this command again")
+    
+    uncovered = 0
+    for collection, query in INDEXED_QUERIES:
+        report = await explain_query(collection, query)
+        status = "OK  " if report["indexed"] else "SCAN"
+        print(f"{status} {collection}.find({list(query)}) -> {' > '.join(filter(None, report['stages']))}")
+        if not report["indexed"]:
+            uncovered += 1
+    
+    print(f"{len(INDEXED_QUERIES) - uncovered}/{len(INDEXED_QUERIES)} queries use an index")
+    return 1 if uncovered or failed else 0
+
+async def dedupe_sessions_command(args) -> int:
+    # Repeated OAuth exchanges used to insert the same session_token again,
+    # which keeps session_token_unique (and the TTL index) from building.
+    duplicates = server.db.user_sessions.aggregate([
+        {"$sort": {"session_token": 1, "expires_at": -1}},
+        {"$group": {"_id": "$session_token", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+    
+    tokens = 0
+    removed = 0
+    async for group in duplicates:
+        tokens += 1
+        if not args.dry_run:
+            result = await server.db.user_sessions.delete_many({"_id": {"$in": group["ids"][1:]}})
+            removed += result.deleted_count
+        else:
+            removed += len(group["ids"]) - 1
+    
+    action = "would remove" if args.dry_run else "removed"
+    print(f"{tokens} duplicated session tokens, {action} {removed} sessions")
+    return 0
+
+def string_dates_query(fields, after=None) -> dict:
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    return query
+
+async def migrate_collection(collection: str, fields, batch_size: int) -> tuple:
+    """Rewrite string timestamps as dates in _id order, one bulk write per batch.
+
+    Converted documents no longer match the query, so an interrupted run
+    resumes where it stopped when started again.
+    """
+    converted = failed = 0
+    last_id = None
+    while True:
+        batch = await server.db[collection].find(
+            string_dates_query(fields, last_id),
+            {field: 1 for field in fields}
+        ).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return converted, failed
+        
+        last_id = batch[-1]["_id"]
+        operations = []
+        for doc in batch:
+            try:
+                updates = {
+                    field: server.as_utc_datetime(doc[field])
+                    for field in fields
+                    if isinstance(doc.get(field), str)
+                }
+            except ValueError as exc:
+                print(f"skip {collection} {doc['_id']}: {exc}")
+                failed += 1
+                continue
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": updates}))
+        
+        if operations:
+            result = await server.db[collection].bulk_write(operations, ordered=False)
+            converted += result.modified_count
+
+async def migrate_dates_command(args) -> int:
+    failures = 0
+    for collection, fields in server.DATE_FIELDS.items():
+        converted, failed = await migrate_collection(collection, fields, args.batch_size)
+        print(f"{collection}: {converted} converted, {failed} skipped")
+        failures += failed
+    return 1 if failures else 0
+
+async def backfill_renewals_command(args) -> int:
+    # Runs server-side; profiles whose subscription_start is still a string
+    # are left alone until migrate-dates has converted them.
+    result = await server.db.profiles.update_many(
+        {"next_renewal_at": {"$exists": False}, "subscription_start": {"$type": "date"}},
+        [{"$set": {"next_renewal_at": {
+            "$add": ["$subscription_start", server.SUBSCRIPTION_DAYS * 24 * 60 * 60 * 1000]
+        }}}]
+    )
+    remaining = await server.db.profiles.count_documents({"next_renewal_at": {"$exists": False}})
+    print(f"profiles: {result.modified_count} backfilled, {remaining} without next_renewal_at")
+    return 1 if remaining else 0
+
+async def rebuild_rollups_command(args) -> int:
+    # Requires MongoDB 5.0+ for $dateTrunc.
+    for interval in ("day", "month"):
+        collection = server.TAP_ROLLUPS[interval]
+        await server.db.taps_hourly.aggregate([
+            {"$group": {
+                "_id": {
+                    "profile_id": "$profile_id",
+                    "bucket": {"$dateTrunc": {"date": "$bucket", "unit": interval, "timezone": "UTC"}}
+                },
+                "user_id": {"$first": "$user_id"},
+                "taps": {"$sum": "$taps"}
+            }},
+            {"$project": {
+                "_id": 0,
+                "profile_id": "$_id.profile_id",
+                "bucket": "$_id.bucket",
+                "user_id": 1,
+                "taps": 1
+            }},
+            {"$merge": {
+                "into": collection,
+                "on": ["profile_id", "bucket"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }}
+        ]).to_list(None)
+        print(f"{collection}: {await server.db[collection].count_documents({})} buckets")
+    return 0
+
+async def sweep_command(args) -> int:
+    await server.run_maintenance()
+    stats = server.maintenance_stats
+    print(f"sessions deleted: {stats['sessions_deleted']}")
+    print(f"files deleted: {stats['files_deleted']} ({stats['bytes_reclaimed']} bytes)")
+    return 1 if stats["errors"] else 0
+
+async def render_variants_command(args) -> int:
+    shas = await server.requeue_variants(("pending", "failed", None))
+    try:
+        await asyncio.gather(*list(server.variant_tasks))
+    finally:
+        if server.image_pool is not None:
+            server.image_pool.shutdown(wait=True)
+            server.image_pool = None
+    
+    failed = await server.db.uploads.count_documents({"sha256": {"$in": shas}, "variants_status": "failed"})
+    print(f"rendered variants for {len(shas) - failed} uploads, {failed} failed")
+    return 1 if failed else 0
+
+COMMANDS = {
+    "indexes": indexes_command,
+    "dedupe-sessions": dedupe_sessions_command,
+    "migrate-dates": migrate_dates_command,
+    "backfill-renewals": backfill_renewals_command,
+    "rebuild-rollups": rebuild_rollups_command,
+    "sweep": sweep_command,
+    "render-variants": render_variants_command
+}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="JPM backend management")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("indexes", help="create missing indexes and report which queries use them")
+    dedupe_parser = subparsers.add_parser("dedupe-sessions", help="remove duplicate session tokens, keeping the latest expiry")
+    dedupe_parser.add_argument("--dry-run", action="store_true", help="only report the duplicates")
+    migrate_parser = subparsers.add_parser("migrate-dates", help="convert ISO-string timestamps to BSON dates")
+    migrate_parser.add_argument("--batch-size", type=int, default=500)
+    subparsers.add_parser("backfill-renewals", help="set next_renewal_at on profiles missing it")
+    subparsers.add_parser("rebuild-rollups", help="recompute daily/monthly tap rollups from hourly counts")
+    subparsers.add_parser("sweep", help="delete expired sessions and orphaned uploads once")
+    subparsers.add_parser("render-variants", help="render image variants still pending or failed")
+    args = parser.parse_args()
+    
+    server.connect_db()
+    try:
+        return asyncio.run(COMMANDS[args.command](args))
+    finally:
+        server.client.close()
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,33 +1,272 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Request, Response
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Request, Response, Query
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.routing import Match
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import PyMongoError, BulkWriteError, DuplicateKeyError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError
+from typing import List, Optional, Literal
 import uuid
 from datetime import datetime, timezone, timedelta
 import hashlib
+import hmac
 import secrets
+import base64
+import json
+import re
+import csv
+import io
+import itertools
+from urllib.parse import quote
 import httpx
-import shutil
+import bcrypt
+import orjson
+import asyncio
+import mimetypes
+import multiprocessing
+import time
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+import imaging
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ["method", "route"]
+)
+HTTP_REQUEST_MONGO_ROUNDTRIPS = Histogram(
+    "http_request_mongo_roundtrips", "MongoDB commands sent per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["collection", "command"]
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total", "MongoDB commands that failed", ["collection", "command"]
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongo_pool_connections", "MongoDB pool connections by state", ["address", "state"]
+)
+
+# Commands sent while serving the current request, as (command, collection,
+# seconds). Motor runs pymongo calls with a copy of the caller's context, so
+# the listener below sees the list set by MetricsMiddleware.
+request_queries: ContextVar[Optional[list]] = ContextVar("request_queries", default=None)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command sent by the client, per collection and command"""
+    
+    def __init__(self):
+        self.collections = {}
+    
+    def started(self, event):
+        target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self.collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+    
+    def record(self, event, failed: bool):
+        collection = self.collections.pop((event.connection_id, event.request_id), "")
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name).observe(seconds)
+        if failed:
+            MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+        queries = request_queries.get()
+        if queries is not None:
+            queries.append((event.command_name, collection, seconds))
+    
+    def succeeded(self, event):
+        self.record(event, failed=False)
+    
+    def failed(self, event):
+        self.record(event, failed=True)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Tracks open, checked-out and waiting connections per server pool"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools = {}
+    
+    def update(self, address, **deltas):
+        label = f"{address[0]}:{address[1]}"
+        with self.lock:
+            pool = self.pools.setdefault(label, {"open": 0, "in_use": 0, "waiting": 0})
+            for state, delta in deltas.items():
+                pool[state] += delta
+                MONGO_POOL_CONNECTIONS.labels(label, state).set(pool[state])
+    
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {label: dict(pool) for label, pool in self.pools.items()}
+    
+    def connection_created(self, event):
+        self.update(event.address, open=1)
+    
+    def connection_closed(self, event):
+        self.update(event.address, open=-1)
+    
+    def connection_check_out_started(self, event):
+        self.update(event.address, waiting=1)
+    
+    def connection_check_out_failed(self, event):
+        self.update(event.address, waiting=-1)
+    
+    def connection_checked_out(self, event):
+        self.update(event.address, waiting=-1, in_use=1)
+    
+    def connection_checked_in(self, event):
+        self.update(event.address, in_use=-1)
+    
+    def connection_ready(self, event):
+        pass
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+
+mongo_pool_metrics = MongoPoolMetrics()
+
+# Created by connect_db(), from the app lifespan or at the start of a script.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client: Optional[AsyncIOMotorClient] = None
+db: Optional[AsyncIOMotorDatabase] = None
 
-app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 UPLOADS_DIR = ROOT_DIR / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', '10000'))
+SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', '60'))
+
+PUBLIC_PROFILE_CACHE_SIZE = int(os.environ.get('PUBLIC_PROFILE_CACHE_SIZE', '10000'))
+PUBLIC_PROFILE_CACHE_TTL = float(os.environ.get('PUBLIC_PROFILE_CACHE_TTL', '300'))
+PUBLIC_PROFILE_MAX_AGE = int(os.environ.get('PUBLIC_PROFILE_MAX_AGE', '60'))
+
+VCARD_CACHE_SIZE = int(os.environ.get('VCARD_CACHE_SIZE', '5000'))
+VCARD_CACHE_TTL = float(os.environ.get('VCARD_CACHE_TTL', '3600'))
+
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(64 * 1024)))
+# Room for the multipart boundaries and part headers around the file.
+UPLOAD_BODY_MAX_BYTES = UPLOAD_MAX_BYTES + 64 * 1024
+UPLOAD_PATHS = {"/api/upload"}
+UPLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Stored extensions come from the validated content type, never from the
+# client's filename, so only image types can ever be served back.
+UPLOAD_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+UPLOAD_ALLOWED_TYPES = set(os.environ.get('UPLOAD_ALLOWED_TYPES', ','.join(UPLOAD_EXTENSIONS)).split(',')) & UPLOAD_EXTENSIONS.keys()
+UPLOAD_SERVED_EXTENSIONS = set(UPLOAD_EXTENSIONS.values()) | {".jpeg"}
+
+UNIQUE_LINK_ATTEMPTS = int(os.environ.get('UNIQUE_LINK_ATTEMPTS', '5'))
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '1000'))
+IMPORT_MAX_ERRORS = int(os.environ.get('IMPORT_MAX_ERRORS', '1000'))
+IMPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+IMAGE_VARIANT_SIZES = tuple(sorted(int(size) for size in os.environ.get('IMAGE_VARIANT_SIZES', '128,256,512').split(',')))
+IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', '82'))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+
+OAUTH_SESSION_URL = os.environ.get('OAUTH_SESSION_URL', 'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data')
+OAUTH_CONNECT_TIMEOUT = float(os.environ.get('OAUTH_CONNECT_TIMEOUT', '3'))
+OAUTH_READ_TIMEOUT = float(os.environ.get('OAUTH_READ_TIMEOUT', '5'))
+OAUTH_MAX_CONNECTIONS = int(os.environ.get('OAUTH_MAX_CONNECTIONS', '20'))
+OAUTH_MAX_KEEPALIVE = int(os.environ.get('OAUTH_MAX_KEEPALIVE', '10'))
+OAUTH_RETRIES = int(os.environ.get('OAUTH_RETRIES', '2'))
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', '64'))
+
+SUBSCRIPTION_DAYS = int(os.environ.get('SUBSCRIPTION_DAYS', '365'))
+EXPIRING_WINDOW_DAYS = int(os.environ.get('EXPIRING_WINDOW_DAYS', '30'))
+
+PROFILES_PAGE_SIZE = int(os.environ.get('PROFILES_PAGE_SIZE', '100'))
+PROFILES_PAGE_MAX = 500
+BULK_MAX_IDS = int(os.environ.get('BULK_MAX_IDS', '5000'))
+
+TAP_BUFFER_SIZE = int(os.environ.get('TAP_BUFFER_SIZE', '50000'))
+TAP_FLUSH_INTERVAL = float(os.environ.get('TAP_FLUSH_INTERVAL', '10'))
+
+SWEEP_INTERVAL = float(os.environ.get('SWEEP_INTERVAL', '3600'))
+SWEEP_BATCH_SIZE = int(os.environ.get('SWEEP_BATCH_SIZE', '500'))
+SWEEP_BATCH_PAUSE = float(os.environ.get('SWEEP_BATCH_PAUSE', '0.5'))
+SWEEP_UPLOAD_GRACE = float(os.environ.get('SWEEP_UPLOAD_GRACE', str(24 * 60 * 60)))
+
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', '1'))
+
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '10'))
+MONGO_MAX_IDLE_TIME = float(os.environ.get('MONGO_MAX_IDLE_TIME', '300'))
+MONGO_CONNECT_TIMEOUT = float(os.environ.get('MONGO_CONNECT_TIMEOUT', '5'))
+MONGO_SERVER_SELECTION_TIMEOUT = float(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT', '5'))
+MONGO_WAIT_QUEUE_TIMEOUT = float(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT', '5'))
+# 0 leaves socket reads without a timeout (long manage.py aggregations).
+MONGO_SOCKET_TIMEOUT = float(os.environ.get('MONGO_SOCKET_TIMEOUT', '0'))
+
+READY_MAX_POOL_SATURATION = float(os.environ.get('READY_MAX_POOL_SATURATION', '0.9'))
+READY_PING_TIMEOUT = float(os.environ.get('READY_PING_TIMEOUT', '1'))
+
+def connect_db():
+    global client, db
+    client = AsyncIOMotorClient(
+        mongo_url,
+        tz_aware=True,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=int(MONGO_MAX_IDLE_TIME * 1000),
+        connectTimeoutMS=int(MONGO_CONNECT_TIMEOUT * 1000),
+        serverSelectionTimeoutMS=int(MONGO_SERVER_SELECTION_TIMEOUT * 1000),
+        waitQueueTimeoutMS=int(MONGO_WAIT_QUEUE_TIMEOUT * 1000),
+        socketTimeoutMS=int(MONGO_SOCKET_TIMEOUT * 1000),
+        event_listeners=[MongoCommandMetrics(), mongo_pool_metrics]
+    )
+    db = client[os.environ['DB_NAME']]
+
+pool_warmed = False
+
+async def warm_pool():
+    # Concurrent pings check out MONGO_MIN_POOL_SIZE connections at once, so
+    # the pool is open before the first request instead of filling lazily.
+    global pool_warmed
+    await asyncio.gather(*(db.command("ping") for _ in range(max(MONGO_MIN_POOL_SIZE, 1))))
+    pool_warmed = True
+
+def pool_stats() -> dict:
+    servers = mongo_pool_metrics.snapshot()
+    for pool in servers.values():
+        pool["saturation"] = round(pool["in_use"] / MONGO_MAX_POOL_SIZE, 3)
+    return {
+        "warmed": pool_warmed,
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "min_pool_size": MONGO_MIN_POOL_SIZE,
+        "saturation": max((pool["saturation"] for pool in servers.values()), default=0.0),
+        "servers": servers
+    }
+
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
     user_id: str
@@ -72,9 +311,38 @@ class Profile(BaseModel):
     unique_link: str
     is_archived: bool = False
     subscription_start: datetime
+    next_renewal_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
+class ProfilePage(BaseModel):
+    profiles: List[Profile]
+    next_cursor: Optional[str] = None
+
+# Fast read path: Mongo profile documents are written by this server, so list
+# and public responses copy their fields as-is instead of revalidating them
+# through Profile, and encode them with orjson.
+# Required fields fall back to None, so a malformed document still encodes.
+PROFILE_FIELDS = {
+    name: None if field.is_required() else field.get_default()
+    for name, field in Profile.model_fields.items()
+}
+PROFILE_PROJECTION = {"_id": 0, **{name: 1 for name in PROFILE_FIELDS}}
+
+def profile_payload(profile_doc: dict) -> dict:
+    coerce_dates(profile_doc, "profiles")
+    return {name: profile_doc.get(name, default) for name, default in PROFILE_FIELDS.items()}
+
+def dump_json(content) -> bytes:
+    # OPT_UTC_Z matches Pydantic's "Z" suffix for UTC datetimes.
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+    
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
 class ProfileCreate(BaseModel):
     name: str
     job: str
@@ -91,6 +359,17 @@ class ProfileCreate(BaseModel):
     primary_color: str = "#3B82F6"
     secondary_color: str = "#8B5CF6"
 
+class ImportReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[dict]
+    errors_truncated: bool = False
+
+class BulkProfileAction(BaseModel):
+    action: Literal["archive", "unarchive", "renew", "delete"]
+    profile_ids: Optional[List[str]] = Field(None, min_length=1, max_length=BULK_MAX_IDS)
+    filter: Optional[Literal["all", "expiring", "archived"]] = None
+
 class ProfileUpdate(BaseModel):
     name: Optional[str] = None
     job: Optional[str] = None
@@ -107,56 +386,975 @@ class ProfileUpdate(BaseModel):
     primary_color: Optional[str] = None
     secondary_color: Optional[str] = None
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+    
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        deadline, value = entry
+        if deadline <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key, value, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def pop(self, key):
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+    
+    def discard_where(self, predicate) -> int:
+        keys = [k for k, (_, v) in self._entries.items() if predicate(v)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+    
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+class TapCounter:
+    """Per-(profile, hour) tap counts waiting to be written to Mongo.
+
+    The buffer holds at most maxsize distinct keys; taps for a new key
+    beyond that are dropped and counted rather than blocking the request.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flush_errors = 0
+        self._counts: dict = {}
+    
+    def record(self, user_id: str, profile_id: str, taps: int = 1, when: Optional[datetime] = None):
+        hour = (when or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+        key = (user_id, profile_id, hour)
+        if key not in self._counts and len(self._counts) >= self.maxsize:
+            self.dropped += taps
+            return
+        self._counts[key] = self._counts.get(key, 0) + taps
+        self.recorded += taps
+    
+    def drain(self) -> dict:
+        counts, self._counts = self._counts, {}
+        return counts
+    
+    def restore(self, counts: dict):
+        for (user_id, profile_id, hour), taps in counts.items():
+            self.recorded -= taps
+            self.record(user_id, profile_id, taps, hour)
+    
+    def stats(self) -> dict:
+        return {
+            "pending_keys": len(self._counts),
+            "maxsize": self.maxsize,
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors
+        }
+
+session_cache = TTLCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
+public_profile_cache = TTLCache(PUBLIC_PROFILE_CACHE_SIZE, PUBLIC_PROFILE_CACHE_TTL)
+vcard_cache = TTLCache(VCARD_CACHE_SIZE, VCARD_CACHE_TTL)
+tap_counter = TapCounter(TAP_BUFFER_SIZE)
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True)
+    ],
+    "user_sessions": [
+        IndexModel([("session_token", ASCENDING)], name="session_token_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0)
+    ],
+    "profiles": [
+        IndexModel([("unique_link", ASCENDING)], name="unique_link_unique", unique=True),
+        IndexModel([("profile_id", ASCENDING)], name="profile_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING), ("profile_id", ASCENDING)], name="user_id_created_at"),
+        IndexModel(
+            [("user_id", ASCENDING), ("is_archived", ASCENDING), ("created_at", ASCENDING), ("profile_id", ASCENDING)],
+            name="user_id_is_archived_created_at"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("is_archived", ASCENDING), ("next_renewal_at", ASCENDING)],
+            name="user_id_is_archived_next_renewal_at"
+        )
+    ],
+    "uploads": [
+        IndexModel([("sha256", ASCENDING)], name="sha256_unique", unique=True)
+    ],
+    **{
+        collection: [
+            IndexModel([("profile_id", ASCENDING), ("bucket", ASCENDING)], name="profile_id_bucket_unique", unique=True),
+            IndexModel([("user_id", ASCENDING), ("bucket", ASCENDING)], name="user_id_bucket")
+        ]
+        for collection in ("taps_hourly", "taps_daily", "taps_monthly")
+    }
+}
+
+TAP_ROLLUPS = {
+    "hour": "taps_hourly",
+    "day": "taps_daily",
+    "month": "taps_monthly"
+}
+
+def truncate_bucket(moment: datetime, interval: str) -> datetime:
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if interval in ("day", "month"):
+        moment = moment.replace(hour=0)
+    if interval == "month":
+        moment = moment.replace(day=1)
+    return moment
+
+def next_bucket(bucket: datetime, interval: str) -> datetime:
+    if interval == "hour":
+        return bucket + timedelta(hours=1)
+    if interval == "day":
+        return bucket + timedelta(days=1)
+    return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def rollup_operations(counts: dict, interval: str) -> list:
+    rolled = {}
+    for (user_id, profile_id, hour), taps in counts.items():
+        key = (user_id, profile_id, truncate_bucket(hour, interval))
+        rolled[key] = rolled.get(key, 0) + taps
+    return [
+        UpdateOne(
+            {"profile_id": profile_id, "bucket": bucket},
+            {"$inc": {"taps": taps}, "$setOnInsert": {"user_id": user_id}},
+            upsert=True
+        )
+        for (user_id, profile_id, bucket), taps in rolled.items()
+    ]
+
+async def flush_taps():
+    counts = tap_counter.drain()
+    if not counts:
+        return
+    
+    try:
+        await db.taps_hourly.bulk_write(rollup_operations(counts, "hour"), ordered=False)
+    except BulkWriteError as exc:
+        # Keys are already hourly, so operation i is the i-th key. The batch
+        # is unordered: everything outside writeErrors landed, and restoring
+        # it would count those taps twice on the next flush.
+        keys = list(counts)
+        failed = {keys[error["index"]] for error in exc.details.get("writeErrors", [])}
+        logger.error("Tap flush failed for %d of %d keys: %s", len(failed), len(counts), exc)
+        tap_counter.flush_errors += 1
+        tap_counter.restore({key: counts[key] for key in failed})
+        counts = {key: taps for key, taps in counts.items() if key not in failed}
+    except PyMongoError as exc:
+        # Keep the counts for the next flush; what no longer fits is dropped.
+        logger.error("Tap flush failed for %d keys: %s", len(counts), exc)
+        tap_counter.flush_errors += 1
+        tap_counter.restore(counts)
+        return
+    except asyncio.CancelledError:
+        tap_counter.restore(counts)
+        raise
+    tap_counter.flushed += sum(counts.values())
+    
+    # Hourly counts are the source of truth; a failed coarser rollup is not
+    # retried (it would double count) and can be rebuilt from them with
+    # "manage.py rebuild-rollups".
+    for interval in ("day", "month"):
+        try:
+            await db[TAP_ROLLUPS[interval]].bulk_write(rollup_operations(counts, interval), ordered=False)
+        except PyMongoError as exc:
+            logger.error("Tap %s rollup failed for %d keys: %s", interval, len(counts), exc)
+            tap_counter.flush_errors += 1
+
+async def flush_taps_periodically():
+    while True:
+        await asyncio.sleep(TAP_FLUSH_INTERVAL)
+        await flush_taps()
+
+maintenance_stats = {
+    "runs": 0,
+    "errors": 0,
+    "sessions_deleted": 0,
+    "files_deleted": 0,
+    "bytes_reclaimed": 0,
+    "last_run_at": None,
+    "last_duration_s": None
+}
+
+async def sweep_expired_sessions() -> int:
+    """Delete expired sessions in batches, pausing between batches.
+
+    The TTL index covers BSON dates; sessions still holding ISO strings
+    are matched by string comparison until they are migrated.
+    """
+    now = datetime.now(timezone.utc)
+    query = {"$or": [
+        {"expires_at": {"$lt": now}},
+        {"expires_at": {"$type": "string", "$lt": now.isoformat()}}
+    ]}
+    deleted = 0
+    while True:
+        batch = await db.user_sessions.find(query, {"_id": 1}).limit(SWEEP_BATCH_SIZE).to_list(SWEEP_BATCH_SIZE)
+        if not batch:
+            return deleted
+        result = await db.user_sessions.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        deleted += result.deleted_count
+        maintenance_stats["sessions_deleted"] += result.deleted_count
+        await asyncio.sleep(SWEEP_BATCH_PAUSE)
+
+def upload_root(name: str) -> str:
+    """Map an upload, one of its variants or a precompressed sibling to
+    the stem of the original file."""
+    for _, suffix in PRECOMPRESSED_ENCODINGS:
+        name = name.removesuffix(suffix)
+    return re.sub(r"-\d+$", "", Path(name).stem)
+
+async def referenced_upload_roots() -> set:
+    roots = set()
+    cursor = db.profiles.find({"photo_url": {"$regex": "/api/uploads/"}}, {"_id": 0, "photo_url": 1})
+    async for profile_doc in cursor:
+        file_id = profile_doc["photo_url"].split("/api/uploads/", 1)[1].split("?", 1)[0]
+        roots.add(upload_root(file_id))
+    return roots
+
+def list_upload_files() -> list:
+    files = []
+    with os.scandir(UPLOADS_DIR) as entries:
+        for entry in entries:
+            # Temporary files can be renamed away between scandir and stat.
+            try:
+                if entry.is_file():
+                    stat_result = entry.stat()
+                    files.append((entry.name, stat_result.st_size, stat_result.st_mtime))
+            except OSError:
+                continue
+    return files
+
+def remove_stale_uploads(names: list, cutoff: float) -> Optional[int]:
+    """Delete the files of one upload root if all are still older than cutoff.
+
+    The mtimes are checked again right before unlinking: a deduplicated
+    re-upload touches the original mid-sweep, and its URL must keep working.
+    Returns the bytes reclaimed, or None when the root was kept.
+    """
+    paths = [UPLOADS_DIR / name for name in names]
+    sizes = 0
+    for path in paths:
+        try:
+            stat_result = path.stat()
+        except FileNotFoundError:
+            continue
+        if stat_result.st_mtime >= cutoff:
+            return None
+        sizes += stat_result.st_size
+    for path in paths:
+        path.unlink(missing_ok=True)
+    return sizes
+
+async def sweep_orphaned_uploads() -> int:
+    """Delete upload files that no profile photo_url points at.
+
+    Files younger than SWEEP_UPLOAD_GRACE are kept so a photo uploaded
+    but not yet saved on a profile survives, and so are the variants and
+    siblings of such a file.
+    """
+    referenced = await referenced_upload_roots()
+    cutoff = time.time() - SWEEP_UPLOAD_GRACE
+    files = await asyncio.to_thread(list_upload_files)
+    fresh = {upload_root(name) for name, _, mtime in files if mtime >= cutoff}
+    orphans = {}
+    for name, _, _ in files:
+        root = upload_root(name)
+        if root not in referenced and root not in fresh:
+            orphans.setdefault(root, []).append(name)
+    
+    removed = 0
+    roots = list(orphans)
+    for start in range(0, len(roots), SWEEP_BATCH_SIZE):
+        deleted_roots = []
+        for root in roots[start:start + SWEEP_BATCH_SIZE]:
+            try:
+                reclaimed = await asyncio.to_thread(remove_stale_uploads, orphans[root], cutoff)
+            except OSError as exc:
+                maintenance_stats["errors"] += 1
+                logger.error("Could not delete upload %s: %s", root, exc)
+                continue
+            if reclaimed is None:
+                continue
+            deleted_roots.append(root)
+            removed += len(orphans[root])
+            maintenance_stats["files_deleted"] += len(orphans[root])
+            maintenance_stats["bytes_reclaimed"] += reclaimed
+        if deleted_roots:
+            await db.uploads.delete_many({"sha256": {"$in": deleted_roots}})
+        await asyncio.sleep(SWEEP_BATCH_PAUSE)
+    return removed
+
+async def run_maintenance():
+    started = time.monotonic()
+    try:
+        sessions = await sweep_expired_sessions()
+        files = await sweep_orphaned_uploads()
+        logger.info("Maintenance removed %d expired sessions and %d orphaned uploads", sessions, files)
+    except Exception as exc:
+        # A failed pass must not end the periodic task; the next one retries.
+        maintenance_stats["errors"] += 1
+        logger.exception("Maintenance sweep failed: %s", exc)
+    maintenance_stats["runs"] += 1
+    maintenance_stats["last_run_at"] = datetime.now(timezone.utc)
+    maintenance_stats["last_duration_s"] = round(time.monotonic() - started, 3)
+
+async def run_maintenance_periodically():
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        await run_maintenance()
+
+async def ensure_indexes() -> list:
+    """Create every index on its own, so one that cannot be built (e.g. a
+    unique index over duplicate values) does not block the others.
+
+    Returns the (collection, index name) pairs that failed.
+    """
+    failed = []
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except PyMongoError as exc:
+                name = index.document["name"]
+                failed.append((collection, name))
+                logger.error("Index creation failed on %s.%s: %s", collection, name, exc)
+    return failed
+
+DATE_FIELDS = {
+    "users": ("created_at",),
+    "user_sessions": ("expires_at", "created_at"),
+    "profiles": ("subscription_start", "created_at", "updated_at")
+}
+
+def as_utc_datetime(value) -> datetime:
+    # Documents written before the BSON date migration hold ISO strings.
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def coerce_dates(doc: dict, collection: str) -> dict:
+    for field in DATE_FIELDS[collection]:
+        if doc.get(field) is not None:
+            doc[field] = as_utc_datetime(doc[field])
+    return doc
+
+def next_renewal(subscription_start: datetime) -> datetime:
+    return subscription_start + timedelta(days=SUBSCRIPTION_DAYS)
+
+def profiles_query(user_id: str, filter: Optional[str]) -> dict:
+    query = {"user_id": user_id}
+    if filter == "expiring":
+        now = datetime.now(timezone.utc)
+        query["is_archived"] = False
+        query["next_renewal_at"] = {"$gt": now, "$lte": now + timedelta(days=EXPIRING_WINDOW_DAYS)}
+    elif filter == "archived":
+        query["is_archived"] = True
+    return query
+
+def stats_range(start: Optional[datetime], end: Optional[datetime], interval: Optional[str]) -> tuple:
+    """Resolve a stats request to (start, end, interval) on bucket boundaries.
+
+    Without an explicit interval, the coarsest rollup whose buckets line up
+    with both ends of the range is used. The default range is the last 30
+    whole days.
+    """
+    if end is None:
+        end = truncate_bucket(datetime.now(timezone.utc), "day") + timedelta(days=1)
+    if start is None:
+        start = end - timedelta(days=30)
+    start = as_utc_datetime(start).astimezone(timezone.utc)
+    end = as_utc_datetime(end).astimezone(timezone.utc)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="La date de début doit précéder la date de fin")
+    
+    if interval is None:
+        interval = next(
+            (i for i in ("month", "day", "hour")
+             if truncate_bucket(start, i) == start and truncate_bucket(end, i) == end),
+            "hour"
+        )
+    
+    start = truncate_bucket(start, interval)
+    if truncate_bucket(end, interval) != end:
+        end = next_bucket(truncate_bucket(end, interval), interval)
+    return start, end, interval
+
+async def tap_stats(match: dict, start: datetime, end: datetime, interval: str) -> dict:
+    series = await db[TAP_ROLLUPS[interval]].aggregate([
+        {"$match": {**match, "bucket": {"$gte": start, "$lt": end}}},
+        {"$group": {"_id": "$bucket", "taps": {"$sum": "$taps"}}},
+        {"$sort": {"_id": 1}}
+    ]).to_list(None)
+    return {
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "total": sum(point["taps"] for point in series),
+        "series": [{"bucket": point["_id"], "taps": point["taps"]} for point in series]
+    }
+
+PROFILE_SORT = [("created_at", ASCENDING), ("profile_id", ASCENDING)]
+
+def encode_cursor(profile_doc: dict) -> str:
+    position = [as_utc_datetime(profile_doc["created_at"]).isoformat(), profile_doc["profile_id"]]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        created_at, profile_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at = as_utc_datetime(created_at)
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    
+    return {"$or": [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "profile_id": {"$gt": profile_id}}
+    ]}
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def handle_url(base: str, handle: str) -> str:
+    return handle if handle.startswith("http") else f"{base}{handle.lstrip('@')}"
+
+SOCIAL_URLS = {
+    "instagram": lambda handle: f"https://instagram.com/{handle.replace('@', '')}",
+    "facebook": lambda handle: handle_url("https://facebook.com/", handle),
+    "linkedin": lambda handle: handle_url("https://linkedin.com/in/", handle),
+    "tiktok": lambda handle: f"https://tiktok.com/@{handle.replace('@', '')}",
+    "youtube": lambda handle: handle_url("https://youtube.com/@", handle)
+}
+
+def vcard_escape(value: str) -> str:
+    value = value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+    return value.replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n")
+
+def vcard_fold(line: str, limit: int = 75) -> str:
+    # RFC 6350 folding: at most 75 octets per physical line, never splitting
+    # a UTF-8 sequence; continuation lines start with a single space.
+    parts = []
+    current = ""
+    size = 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > limit:
+            parts.append(current)
+            current = " "
+            size = 1
+        current += char
+        size += width
+    parts.append(current)
+    return "\r\n".join(parts)
+
+def render_vcard(profile: Profile, base_url: str) -> bytes:
+    lines = [
+        "BEGIN:VCARD",
+        "VERSION:3.0",
+        f"FN:{vcard_escape(profile.name)}",
+        f"N:{vcard_escape(profile.name)};;;;",
+        f"TITLE:{vcard_escape(profile.job)}",
+        f"TEL;TYPE=CELL,VOICE:{vcard_escape(profile.phone)}"
+    ]
+    
+    if profile.whatsapp:
+        lines.append(f"TEL;TYPE=CELL,X-WHATSAPP:{vcard_escape(profile.whatsapp)}")
+        whatsapp_number = re.sub(r"\D", "", profile.whatsapp)
+        lines.append(f"X-SOCIALPROFILE;TYPE=whatsapp:https://wa.me/{whatsapp_number}")
+    
+    if profile.website:
+        lines.append(f"URL:{vcard_escape(profile.website)}")
+    
+    if profile.address:
+        lines.append(f"ADR;TYPE=WORK:;;{vcard_escape(profile.address)};;;;")
+    
+    for network, to_url in SOCIAL_URLS.items():
+        handle = getattr(profile, network)
+        if handle:
+            lines.append(f"X-SOCIALPROFILE;TYPE={network}:{vcard_escape(to_url(handle))}")
+    
+    if profile.photo_url:
+        photo_url = profile.photo_url
+        if photo_url.startswith("/"):
+            photo_url = base_url.rstrip("/") + photo_url
+        lines.append(f"PHOTO;VALUE=URI:{vcard_escape(photo_url)}")
+    
+    lines.append(f"REV:{profile.updated_at.strftime('%Y%m%dT%H%M%SZ')}")
+    lines.append("END:VCARD")
+    
+    return ("\r\n".join(vcard_fold(line) for line in lines) + "\r\n").encode("utf-8")
+
+def magic_matches(content_type: str, head: bytes) -> bool:
+    if content_type == "image/png":
+        return head.startswith(b"\x89PNG\r\n\x1a\n")
+    if content_type == "image/jpeg":
+        return head.startswith(b"\xff\xd8\xff")
+    if content_type == "image/gif":
+        return head.startswith((b"GIF87a", b"GIF89a"))
+    if content_type == "image/webp":
+        return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+    return False
+
+async def stream_upload(file: UploadFile, destination: Path) -> tuple:
+    """Copy an upload to destination in chunks, hashing it on the way.
+
+    Blocking file I/O runs in a worker thread; the partial file is removed
+    if the upload exceeds UPLOAD_MAX_BYTES or its first bytes do not match
+    the declared content type.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    buffer = await asyncio.to_thread(destination.open, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            if size == 0 and not magic_matches(file.content_type, chunk):
+                raise HTTPException(status_code=415, detail="Le contenu ne correspond pas au type déclaré")
+            size += len(chunk)
+            if size > UPLOAD_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Fichier trop volumineux")
+            digest.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Fichier vide")
+    except BaseException:
+        await asyncio.to_thread(buffer.close)
+        await asyncio.to_thread(destination.unlink, missing_ok=True)
+        raise
+    await asyncio.to_thread(buffer.close)
+    return digest.hexdigest(), size
+
+image_pool: Optional[ProcessPoolExecutor] = None
+variant_tasks: set = set()
+variant_shas: set = set()
+
+def get_image_pool() -> ProcessPoolExecutor:
+    global image_pool
+    if image_pool is None:
+        # spawn keeps Motor's threads and sockets out of the workers.
+        image_pool = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return image_pool
+
+async def generate_variants(sha256: str, file_id: str):
+    try:
+        variants = await asyncio.get_running_loop().run_in_executor(
+            get_image_pool(),
+            imaging.render_variants,
+            str(UPLOADS_DIR / file_id),
+            str(UPLOADS_DIR),
+            sha256,
+            IMAGE_VARIANT_SIZES,
+            IMAGE_VARIANT_QUALITY
+        )
+    except Exception as exc:
+        logger.error("Image variants failed for %s: %s", file_id, exc)
+        await db.uploads.update_one({"sha256": sha256}, {"$set": {"variants_status": "failed"}})
+        return
+    
+    await db.uploads.update_one(
+        {"sha256": sha256},
+        {"$set": {"variants": variants, "variants_status": "ready"}}
+    )
+
+def enqueue_variants(sha256: str, file_id: str):
+    if sha256 in variant_shas:
+        return
+    variant_shas.add(sha256)
+    task = asyncio.create_task(generate_variants(sha256, file_id))
+    variant_tasks.add(task)
+    task.add_done_callback(variant_tasks.discard)
+    task.add_done_callback(lambda _: variant_shas.discard(sha256))
+
+async def requeue_variants(statuses=("pending", None)) -> list:
+    """Queue variants again for uploads left in one of statuses, e.g. jobs
+    cancelled by a restart. None matches uploads stored before variants."""
+    uploads = await db.uploads.find(
+        {"variants_status": {"$in": list(statuses)}},
+        {"_id": 0, "sha256": 1, "file_id": 1}
+    ).to_list(None)
+    for upload in uploads:
+        enqueue_variants(upload["sha256"], upload["file_id"])
+    return [upload["sha256"] for upload in uploads]
+
+def nearest_variant(file_id: str, size: Optional[int], fmt: Optional[str]) -> str:
+    if fmt not in imaging.VARIANT_FORMATS:
+        fmt = "webp"
+    target = size or IMAGE_VARIANT_SIZES[-1]
+    chosen = next((s for s in IMAGE_VARIANT_SIZES if s >= target), IMAGE_VARIANT_SIZES[-1])
+    return imaging.variant_file_id(Path(file_id).stem, chosen, fmt)
+
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set:
+    encodings = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(coding.lower())
+    return encodings
+
+def file_validators(stat_result: os.stat_result) -> tuple:
+    etag = f'"{hashlib.md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode()).hexdigest()}"'
+    return etag, formatdate(stat_result.st_mtime, usegmt=True)
+
+def not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def parse_byte_range(range_header: str, size: int) -> Optional[tuple]:
+    """Parse a single "bytes=" range into inclusive (start, end) offsets.
+
+    Returns None for headers we do not honour (other units, multiple
+    ranges), which means the whole file is sent.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = size - int(last), size - 1
+    except ValueError:
+        return None
+    start, end = max(start, 0), min(end, size - 1)
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Plage non satisfaisable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+async def iter_file_range(path: Path, start: int, end: int):
+    chunk_size = FileResponse.chunk_size
+    handle = await asyncio.to_thread(path.open, "rb")
+    try:
+        await asyncio.to_thread(handle.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(handle.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(handle.close)
+
+async def serve_file(request: Request, path: Path, cache_control: str) -> Response:
+    """Serve a file with validators, conditional GET, byte ranges and
+    precompressed .br/.gz siblings.
+
+    Full responses go through FileResponse, which uses the server's
+    pathsend extension (sendfile) when it offers one.
+    """
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    headers = {
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+        "X-Content-Type-Options": "nosniff"
+    }
+    range_header = request.headers.get("Range")
+    
+    if not range_header:
+        encodings = accepted_encodings(request.headers.get("Accept-Encoding"))
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            sibling = path.with_name(path.name + suffix)
+            if encoding in encodings and await asyncio.to_thread(sibling.is_file):
+                path = sibling
+                headers["Content-Encoding"] = encoding
+                break
+    
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Fichier non trouvé")
+    
+    etag, last_modified = file_validators(stat_result)
+    headers["ETag"] = etag
+    headers["Last-Modified"] = last_modified
+    
+    if not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+    
+    if_range = request.headers.get("If-Range")
+    if range_header and (not if_range or if_range in (etag, last_modified)):
+        byte_range = parse_byte_range(range_header, stat_result.st_size)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+    
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+oauth_http: Optional[httpx.AsyncClient] = None
+
+def get_oauth_client() -> httpx.AsyncClient:
+    global oauth_http
+    if oauth_http is None:
+        oauth_http = httpx.AsyncClient(
+            timeout=httpx.Timeout(OAUTH_READ_TIMEOUT, connect=OAUTH_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=OAUTH_MAX_CONNECTIONS,
+                max_keepalive_connections=OAUTH_MAX_KEEPALIVE,
+                keepalive_expiry=30
+            )
+        )
+    return oauth_http
+
+async def fetch_oauth_session(session_id: str) -> dict:
+    """Look up an OAuth session upstream over the shared keep-alive client.
+
+    Transport errors and 5xx answers are retried up to OAUTH_RETRIES times;
+    any other non-200 answer means the session is invalid.
+    """
+    for attempt in range(OAUTH_RETRIES + 1):
+        try:
+            resp = await get_oauth_client().get(OAUTH_SESSION_URL, headers={"X-Session-ID": session_id})
+        except httpx.TransportError as exc:
+            logger.warning("OAuth session lookup failed (attempt %d): %s", attempt + 1, exc)
+        else:
+            if resp.status_code < 500:
+                break
+            logger.warning("OAuth session lookup returned %d (attempt %d)", resp.status_code, attempt + 1)
+        if attempt < OAUTH_RETRIES:
+            await asyncio.sleep(0.1 * 2 ** attempt)
+    else:
+        raise HTTPException(status_code=502, detail="Service d'authentification indisponible")
+    
+    if resp.status_code != 200:
+        raise HTTPException(status_code=401, detail="Session invalide")
+    return resp.json()
+
+password_pool: Optional[ThreadPoolExecutor] = None
+password_jobs = 0
+
+def get_password_pool() -> ThreadPoolExecutor:
+    global password_pool
+    if password_pool is None:
+        password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password")
+    return password_pool
+
+def bcrypt_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+def check_password(plain: str, hashed: str) -> bool:
+    if hashed.startswith("$2"):
+        try:
+            return bcrypt.checkpw(plain.encode(), hashed.encode())
+        except ValueError:
+            return False
+    # Accounts created before bcrypt store an unsalted SHA-256 hex digest.
+    return bool(hashed) and hmac.compare_digest(hashlib.sha256(plain.encode()).hexdigest(), hashed)
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return hash_password(plain) == hashed
+def password_needs_rehash(hashed: str) -> bool:
+    if not hashed.startswith("$2"):
+        return True
+    return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+
+async def run_password_job(func, *args):
+    """Run a slow hash in password_pool, shedding load once more than
+    PASSWORD_HASH_QUEUE jobs are waiting for a worker."""
+    global password_jobs
+    if password_jobs >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE:
+        raise HTTPException(status_code=503, detail="Serveur occupé, réessayez", headers={"Retry-After": "1"})
+    
+    password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_password_pool(), func, *args)
+    finally:
+        password_jobs -= 1
+
+async def hash_password(password: str) -> str:
+    return await run_password_job(bcrypt_hash, password)
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await run_password_job(check_password, plain, hashed)
 
 def generate_unique_link(name: str) -> str:
     clean_name = "".join(c.lower() if c.isalnum() else "-" for c in name)
     random_code = secrets.token_hex(4)
     return f"{clean_name}-{random_code}"
 
-async def get_user_from_token(request: Request) -> Optional[User]:
+def new_profile_doc(user_id: str, data: ProfileCreate, now: datetime) -> dict:
+    return {
+        "profile_id": f"profile_{uuid.uuid4().hex[:12]}",
+        "user_id": user_id,
+        **data.model_dump(),
+        "unique_link": generate_unique_link(data.name),
+        "is_archived": False,
+        "subscription_start": now,
+        "next_renewal_at": next_renewal(now),
+        "created_at": now,
+        "updated_at": now
+    }
+
+def iter_import_rows(binary_file, fmt: str):
+    """Yield (row_number, ProfileCreate or error list) for each record.
+
+    Reads the upload lazily, one line or CSV record at a time; empty
+    cells count as missing so model defaults apply.
+    """
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        records = ((reader.line_num, row) for row in reader)
+    else:
+        records = ((number, line) for number, line in enumerate(text, start=1) if line.strip())
+    
+    for number, record in records:
+        try:
+            if fmt != "csv":
+                record = json.loads(record)
+                if not isinstance(record, dict):
+                    raise ValueError("objet JSON attendu")
+            record = {k: v for k, v in record.items() if k is not None and v not in ("", None)}
+            yield number, ProfileCreate.model_validate(record)
+        except ValidationError as exc:
+            yield number, [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()]
+        except ValueError as exc:
+            yield number, [str(exc)]
+
+async def insert_profiles(profile_docs: list) -> list:
+    """Insert profiles in one unordered write, trusting the unique index on
+    unique_link instead of checking for free slugs first.
+
+    Documents rejected for a duplicate unique_link get a fresh slug and are
+    retried, up to UNIQUE_LINK_ATTEMPTS writes; any other error propagates.
+    """
+    pending = profile_docs
+    for _ in range(UNIQUE_LINK_ATTEMPTS):
+        try:
+            await db.profiles.insert_many(pending, ordered=False)
+            return profile_docs
+        except BulkWriteError as exc:
+            errors = exc.details["writeErrors"]
+            if not all(e["code"] == 11000 and "unique_link" in e.get("errmsg", "") for e in errors):
+                raise
+            pending = [pending[e["index"]] for e in errors]
+        
+        for profile_doc in pending:
+            profile_doc["unique_link"] = generate_unique_link(profile_doc["name"])
+    
+    raise HTTPException(status_code=503, detail="Impossible d'attribuer un lien unique, réessayez")
+
+def get_session_token(request: Request) -> Optional[str]:
     session_token = request.cookies.get("session_token")
     if not session_token:
         auth_header = request.headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
             session_token = auth_header.replace("Bearer ", "")
-    
+    return session_token
+
+def session_user_pipeline(session_token: str) -> list:
+    return [
+        {"$match": {"session_token": session_token}},
+        {"$limit": 1},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user_id",
+            "foreignField": "user_id",
+            "as": "user"
+        }},
+        {"$project": {
+            "_id": 0,
+            "expires_at": 1,
+            "user": {"$arrayElemAt": ["$user", 0]}
+        }}
+    ]
+
+async def get_user_from_token(request: Request) -> Optional[User]:
+    session_token = get_session_token(request)
     if not session_token:
         return None
     
-    session_doc = await db.user_sessions.find_one(
-        {"session_token": session_token},
-        {"_id": 0}
-    )
+    cached_user = session_cache.get(session_token)
+    if cached_user is not None:
+        return cached_user
+    
+    session_docs = await db.user_sessions.aggregate(
+        session_user_pipeline(session_token)
+    ).to_list(1)
     
-    if not session_doc:
+    if not session_docs:
         return None
     
-    expires_at = session_doc["expires_at"]
-    if isinstance(expires_at, str):
-        expires_at = datetime.fromisoformat(expires_at)
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    session_doc = session_docs[0]
     
-    if expires_at < datetime.now(timezone.utc):
-        return None
+    expires_at = as_utc_datetime(session_doc["expires_at"])
     
-    user_doc = await db.users.find_one(
-        {"user_id": session_doc["user_id"]},
-        {"_id": 0}
-    )
+    now = datetime.now(timezone.utc)
+    if expires_at < now:
+        return None
     
+    user_doc = session_doc.get("user")
     if not user_doc:
         return None
     
-    if isinstance(user_doc["created_at"], str):
-        user_doc["created_at"] = datetime.fromisoformat(user_doc["created_at"])
-    
-    return User(**user_doc)
+    user = User(**coerce_dates(user_doc, "users"))
+    session_cache.set(session_token, user, ttl=(expires_at - now).total_seconds())
+    return user
 
 @api_router.post("/auth/register")
 async def register(data: RegisterRequest, response: Response):
@@ -165,7 +1363,7 @@ async def register(data: RegisterRequest, response: Response):
         raise HTTPException(status_code=400, detail="Email déjà utilisé")
     
     user_id = f"user_{uuid.uuid4().hex[:12]}"
-    hashed_pw = hash_password(data.password)
+    hashed_pw = await hash_password(data.password)
     
     user_doc = {
         "user_id": user_id,
@@ -173,17 +1371,21 @@ async def register(data: RegisterRequest, response: Response):
         "name": data.name,
         "password": hashed_pw,
         "picture": None,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration for the same email.
+        raise HTTPException(status_code=400, detail="Email déjà utilisé")
     
     session_token = secrets.token_urlsafe(32)
     session_doc = {
         "user_id": user_id,
         "session_token": session_token,
-        "expires_at": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.user_sessions.insert_one(session_doc)
@@ -203,15 +1405,21 @@ async def register(data: RegisterRequest, response: Response):
 @api_router.post("/auth/login")
 async def login(data: LoginRequest, response: Response):
     user_doc = await db.users.find_one({"email": data.email}, {"_id": 0})
-    if not user_doc or not verify_password(data.password, user_doc.get("password", "")):
+    if not user_doc or not await verify_password(data.password, user_doc.get("password") or ""):
         raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
     
+    if password_needs_rehash(user_doc["password"]):
+        await db.users.update_one(
+            {"user_id": user_doc["user_id"], "password": user_doc["password"]},
+            {"$set": {"password": await hash_password(data.password)}}
+        )
+    
     session_token = secrets.token_urlsafe(32)
     session_doc = {
         "user_id": user_doc["user_id"],
         "session_token": session_token,
-        "expires_at": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.user_sessions.insert_one(session_doc)
@@ -242,48 +1450,34 @@ async def exchange_session(request: Request, response: Response):
     if not session_id:
         raise HTTPException(status_code=400, detail="Session ID manquant")
     
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-            headers={"X-Session-ID": session_id}
-        )
-        
-        if resp.status_code != 200:
-            raise HTTPException(status_code=401, detail="Session invalide")
-        
-        oauth_data = resp.json()
-    
-    user_doc = await db.users.find_one({"email": oauth_data["email"]}, {"_id": 0})
-    
-    if user_doc:
-        user_id = user_doc["user_id"]
-        await db.users.update_one(
-            {"user_id": user_id},
-            {"$set": {
-                "name": oauth_data["name"],
-                "picture": oauth_data["picture"]
-            }}
-        )
-    else:
-        user_id = f"user_{uuid.uuid4().hex[:12]}"
-        user_doc = {
-            "user_id": user_id,
-            "email": oauth_data["email"],
-            "name": oauth_data["name"],
-            "picture": oauth_data["picture"],
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.users.insert_one(user_doc)
+    oauth_data = await fetch_oauth_session(session_id)
+    
+    # Upserts keep repeated or concurrent exchanges (e.g. a reloaded
+    # /auth-callback re-posting the same session_id) clear of the unique
+    # email and session_token indexes.
+    final_user = await db.users.find_one_and_update(
+        {"email": oauth_data["email"]},
+        {
+            "$set": {"name": oauth_data["name"], "picture": oauth_data["picture"]},
+            "$setOnInsert": {"user_id": f"user_{uuid.uuid4().hex[:12]}", "created_at": datetime.now(timezone.utc)}
+        },
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    user_id = final_user["user_id"]
+    session_cache.discard_where(lambda cached: cached.user_id == user_id)
     
     session_token = oauth_data["session_token"]
-    session_doc = {
-        "user_id": user_id,
-        "session_token": session_token,
-        "expires_at": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    
-    await db.user_sessions.insert_one(session_doc)
+    session_cache.pop(session_token)
+    await db.user_sessions.update_one(
+        {"session_token": session_token},
+        {
+            "$set": {"user_id": user_id, "expires_at": datetime.now(timezone.utc) + timedelta(days=7)},
+            "$setOnInsert": {"created_at": datetime.now(timezone.utc)}
+        },
+        upsert=True
+    )
     
     response.set_cookie(
         key="session_token",
@@ -295,8 +1489,6 @@ async def exchange_session(request: Request, response: Response):
         path="/"
     )
     
-    final_user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
-    
     return {
         "session_token": session_token,
         "user": {
@@ -316,8 +1508,9 @@ async def get_current_user(request: Request):
 
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
-    session_token = request.cookies.get("session_token")
+    session_token = get_session_token(request)
     if session_token:
+        session_cache.pop(session_token)
         await db.user_sessions.delete_one({"session_token": session_token})
     
     response.delete_cookie("session_token", path="/", samesite="none", secure=True)
@@ -325,21 +1518,73 @@ async def logout(request: Request, response: Response):
 
 @api_router.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
-    file_ext = Path(file.filename).suffix
-    file_id = f"{uuid.uuid4().hex}{file_ext}"
-    file_path = UPLOADS_DIR / file_id
-    
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    return {"url": f"/api/uploads/{file_id}"}
+    if file.content_type not in UPLOAD_ALLOWED_TYPES:
+        raise HTTPException(status_code=415, detail="Type de fichier non autorisé")
+    
+    temp_path = UPLOADS_DIR / f".upload-{uuid.uuid4().hex}.tmp"
+    sha256, size = await stream_upload(file, temp_path)
+    
+    # Uploads are stored under their content hash; identical content maps to
+    # the file and URL already recorded for that hash. upload_count only
+    # counts uploads: files are kept or swept by profile references.
+    new_file_id = f"{sha256}{UPLOAD_EXTENSIONS[file.content_type]}"
+    try:
+        previous = await db.uploads.find_one_and_update(
+            {"sha256": sha256},
+            {
+                "$setOnInsert": {
+                    "file_id": new_file_id,
+                    "size": size,
+                    "content_type": file.content_type,
+                    "variants": [],
+                    "variants_status": "pending",
+                    "created_at": datetime.now(timezone.utc)
+                },
+                "$inc": {"upload_count": 1}
+            },
+            projection={"_id": 0, "file_id": 1, "variants_status": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        upload_doc = previous or {"file_id": new_file_id}
+        
+        file_path = UPLOADS_DIR / upload_doc["file_id"]
+        if await asyncio.to_thread(file_path.exists):
+            # A re-upload restarts the sweeper's grace period for the file.
+            await asyncio.to_thread(os.utime, file_path)
+        else:
+            await asyncio.to_thread(temp_path.replace, file_path)
+    finally:
+        await asyncio.to_thread(temp_path.unlink, missing_ok=True)
+    
+    # A re-upload also retries variants that failed or never finished.
+    if previous is None or previous.get("variants_status") != "ready":
+        enqueue_variants(sha256, upload_doc["file_id"])
+    
+    return {"url": f"/api/uploads/{upload_doc['file_id']}", "sha256": sha256, "size": size}
 
 @api_router.get("/uploads/{file_id}")
-async def get_upload(file_id: str):
-    file_path = UPLOADS_DIR / file_id
-    if not file_path.exists():
+async def get_upload(
+    file_id: str,
+    request: Request,
+    size: Optional[int] = Query(None, ge=1),
+    format: Optional[str] = None
+):
+    if file_id.startswith(".") or Path(file_id).suffix.lower() not in UPLOAD_SERVED_EXTENSIONS:
         raise HTTPException(status_code=404, detail="Fichier non trouvé")
-    return FileResponse(file_path)
+    
+    file_path = UPLOADS_DIR / file_id
+    cache_control = UPLOAD_CACHE_CONTROL
+    if size or format:
+        variant_path = UPLOADS_DIR / nearest_variant(file_id, size, format)
+        if await asyncio.to_thread(variant_path.is_file):
+            file_path = variant_path
+        else:
+            # The variant is not rendered yet; serve the original without
+            # letting caches pin it to this URL.
+            cache_control = "no-cache"
+    
+    return await serve_file(request, file_path, cache_control)
 
 @api_router.post("/profiles", response_model=Profile)
 async def create_profile(data: ProfileCreate, request: Request):
@@ -347,81 +1592,104 @@ async def create_profile(data: ProfileCreate, request: Request):
     if not user:
         raise HTTPException(status_code=401, detail="Non authentifié")
     
-    profile_id = f"profile_{uuid.uuid4().hex[:12]}"
-    unique_link = generate_unique_link(data.name)
-    
-    existing = await db.profiles.find_one({"unique_link": unique_link})
-    while existing:
-        unique_link = generate_unique_link(data.name)
-        existing = await db.profiles.find_one({"unique_link": unique_link})
-    
-    now = datetime.now(timezone.utc)
-    profile_doc = {
-        "profile_id": profile_id,
-        "user_id": user.user_id,
-        **data.model_dump(),
-        "unique_link": unique_link,
-        "is_archived": False,
-        "subscription_start": now.isoformat(),
-        "created_at": now.isoformat(),
-        "updated_at": now.isoformat()
-    }
-    
-    await db.profiles.insert_one(profile_doc)
-    
-    profile_doc["subscription_start"] = now
-    profile_doc["created_at"] = now
-    profile_doc["updated_at"] = now
+    profile_doc = new_profile_doc(user.user_id, data, datetime.now(timezone.utc))
+    await insert_profiles([profile_doc])
     
     return Profile(**{k: v for k, v in profile_doc.items() if k != "_id"})
 
-@api_router.get("/profiles", response_model=List[Profile])
-async def get_profiles(request: Request, filter: Optional[str] = None):
+@api_router.post("/profiles/import", response_model=ImportReport)
+async def import_profiles(request: Request, file: UploadFile = File(...)):
     user = await get_user_from_token(request)
     if not user:
         raise HTTPException(status_code=401, detail="Non authentifié")
     
-    query = {"user_id": user.user_id}
-    
-    if filter == "expiring":
+    fmt = IMPORT_FORMATS.get(Path(file.filename or "").suffix.lower())
+    if not fmt:
+        raise HTTPException(status_code=415, detail="Format non supporté (CSV ou JSONL)")
+    
+    # Parsing and validation run in a worker thread, one batch at a time,
+    # so only IMPORT_BATCH_SIZE rows are held in memory.
+    rows = iter_import_rows(file.file, fmt)
+    report = ImportReport(inserted=0, failed=0, errors=[])
+    while True:
+        try:
+            batch = await asyncio.to_thread(list, itertools.islice(rows, IMPORT_BATCH_SIZE))
+        except (csv.Error, UnicodeDecodeError) as exc:
+            report.failed += 1
+            report.errors.append({"row": None, "errors": [f"Lecture interrompue: {exc}"]})
+            break
+        if not batch:
+            break
+        
         now = datetime.now(timezone.utc)
-        expiry_threshold = now + timedelta(days=30)
-        profiles = await db.profiles.find(query, {"_id": 0}).to_list(1000)
-        filtered_profiles = []
-        for p in profiles:
-            sub_start = p["subscription_start"]
-            if isinstance(sub_start, str):
-                sub_start = datetime.fromisoformat(sub_start)
-            if sub_start.tzinfo is None:
-                sub_start = sub_start.replace(tzinfo=timezone.utc)
-            next_renewal = sub_start + timedelta(days=365)
-            if now < next_renewal <= expiry_threshold and not p.get("is_archived", False):
-                filtered_profiles.append(p)
-        profiles = filtered_profiles
-    elif filter == "archived":
-        query["is_archived"] = True
-        profiles = await db.profiles.find(query, {"_id": 0}).to_list(1000)
-    else:
-        profiles = await db.profiles.find(query, {"_id": 0}).to_list(1000)
-    
-    for p in profiles:
-        for date_field in ["subscription_start", "created_at", "updated_at"]:
-            if isinstance(p[date_field], str):
-                p[date_field] = datetime.fromisoformat(p[date_field])
+        profile_docs = []
+        for number, result in batch:
+            if isinstance(result, ProfileCreate):
+                profile_docs.append(new_profile_doc(user.user_id, result, now))
+                continue
+            report.failed += 1
+            if len(report.errors) < IMPORT_MAX_ERRORS:
+                report.errors.append({"row": number, "errors": result})
+            else:
+                report.errors_truncated = True
+        
+        if profile_docs:
+            await insert_profiles(profile_docs)
+            report.inserted += len(profile_docs)
     
-    return [Profile(**p) for p in profiles]
+    return report
 
-@api_router.get("/profiles/public/{unique_link}")
-async def get_public_profile(unique_link: str):
-    profile_doc = await db.profiles.find_one({"unique_link": unique_link}, {"_id": 0})
-    if not profile_doc:
-        raise HTTPException(status_code=404, detail="Profil non trouvé")
+async def stream_profiles(cursor):
+    async for profile_doc in cursor:
+        yield dump_json(profile_payload(profile_doc)) + b"\n"
+
+@api_router.get("/profiles", response_model=ProfilePage)
+async def get_profiles(
+    request: Request,
+    filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PROFILES_PAGE_SIZE, ge=1, le=PROFILES_PAGE_MAX),
+    format: Optional[str] = None
+):
+    user = await get_user_from_token(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Non authentifié")
     
-    for date_field in ["subscription_start", "created_at", "updated_at"]:
-        if isinstance(profile_doc[date_field], str):
-            profile_doc[date_field] = datetime.fromisoformat(profile_doc[date_field])
+    query = profiles_query(user.user_id, filter)
+    if cursor:
+        query.update(decode_cursor(cursor))
     
-    return Profile(**profile_doc)
+    profiles_cursor = db.profiles.find(query, PROFILE_PROJECTION).sort(PROFILE_SORT)
+    
+    if format == "ndjson":
+        return StreamingResponse(stream_profiles(profiles_cursor), media_type="application/x-ndjson")
+    
+    profiles = await profiles_cursor.limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(profiles[limit - 1]) if len(profiles) > limit else None
+    
+    return FastJSONResponse({
+        "profiles": [profile_payload(p) for p in profiles[:limit]],
+        "next_cursor": next_cursor
+    })
+
+@api_router.get("/profiles/public/{unique_link}", response_model=Profile)
+async def get_public_profile(unique_link: str, request: Request):
+    cached = public_profile_cache.get(unique_link)
+    if cached is None:
+        profile_doc = await db.profiles.find_one({"unique_link": unique_link}, {"_id": 0})
+        if not profile_doc:
+            raise HTTPException(status_code=404, detail="Profil non trouvé")
+        
+        body = dump_json(profile_payload(profile_doc))
+        cached = (body, make_etag(body), profile_doc["user_id"], profile_doc["profile_id"])
+        public_profile_cache.set(unique_link, cached)
+    
+    body, etag, user_id, profile_id = cached
+    tap_counter.record(user_id, profile_id)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={PUBLIC_PROFILE_MAX_AGE}"}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @api_router.get("/profiles/{profile_id}", response_model=Profile)
 async def get_profile(profile_id: str, request: Request):
@@ -437,11 +1705,7 @@ async def get_profile(profile_id: str, request: Request):
     if not profile_doc:
         raise HTTPException(status_code=404, detail="Profil non trouvé")
     
-    for date_field in ["subscription_start", "created_at", "updated_at"]:
-        if isinstance(profile_doc[date_field], str):
-            profile_doc[date_field] = datetime.fromisoformat(profile_doc[date_field])
-    
-    return Profile(**profile_doc)
+    return Profile(**coerce_dates(profile_doc, "profiles"))
 
 @api_router.put("/profiles/{profile_id}", response_model=Profile)
 async def update_profile(profile_id: str, data: ProfileUpdate, request: Request):
@@ -453,23 +1717,21 @@ async def update_profile(profile_id: str, data: ProfileUpdate, request: Request)
     if not update_data:
         raise HTTPException(status_code=400, detail="Aucune donnée à mettre à jour")
     
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+    update_data["updated_at"] = datetime.now(timezone.utc)
     
-    result = await db.profiles.update_one(
+    profile_doc = await db.profiles.find_one_and_update(
         {"profile_id": profile_id, "user_id": user.user_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if not profile_doc:
         raise HTTPException(status_code=404, detail="Profil non trouvé")
     
-    profile_doc = await db.profiles.find_one({"profile_id": profile_id}, {"_id": 0})
+    public_profile_cache.pop(profile_doc["unique_link"])
     
-    for date_field in ["subscription_start", "created_at", "updated_at"]:
-        if isinstance(profile_doc[date_field], str):
-            profile_doc[date_field] = datetime.fromisoformat(profile_doc[date_field])
-    
-    return Profile(**profile_doc)
+    return Profile(**coerce_dates(profile_doc, "profiles"))
 
 @api_router.patch("/profiles/{profile_id}/archive")
 async def toggle_archive(profile_id: str, request: Request):
@@ -477,22 +1739,91 @@ async def toggle_archive(profile_id: str, request: Request):
     if not user:
         raise HTTPException(status_code=401, detail="Non authentifié")
     
-    profile_doc = await db.profiles.find_one(
+    # Pipeline update: the flip is evaluated server-side, so concurrent
+    # toggles serialize on the document instead of overwriting each other.
+    profile_doc = await db.profiles.find_one_and_update(
         {"profile_id": profile_id, "user_id": user.user_id},
-        {"_id": 0}
+        [{"$set": {
+            "is_archived": {"$not": ["$is_archived"]},
+            "updated_at": datetime.now(timezone.utc)
+        }}],
+        projection={"_id": 0, "is_archived": 1, "unique_link": 1},
+        return_document=ReturnDocument.AFTER
     )
     
     if not profile_doc:
         raise HTTPException(status_code=404, detail="Profil non trouvé")
     
-    new_status = not profile_doc.get("is_archived", False)
+    public_profile_cache.pop(profile_doc["unique_link"])
     
-    await db.profiles.update_one(
-        {"profile_id": profile_id},
-        {"$set": {"is_archived": new_status, "updated_at": datetime.now(timezone.utc).isoformat()}}
-    )
+    return {"is_archived": profile_doc["is_archived"]}
+
+@api_router.post("/profiles/bulk")
+async def bulk_profiles(data: BulkProfileAction, request: Request):
+    user = await get_user_from_token(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Non authentifié")
+    
+    if (data.profile_ids is None) == (data.filter is None):
+        raise HTTPException(status_code=400, detail="Indiquez soit profile_ids, soit filter")
+    
+    if data.profile_ids is not None:
+        query = {"user_id": user.user_id, "profile_id": {"$in": data.profile_ids}}
+    else:
+        query = profiles_query(user.user_id, data.filter)
+    
+    now = datetime.now(timezone.utc)
+    if data.action == "delete":
+        result = await db.profiles.delete_many(query)
+        counts = {"matched": result.deleted_count, "modified": result.deleted_count}
+    else:
+        changes = {
+            "archive": {"is_archived": True},
+            "unarchive": {"is_archived": False},
+            "renew": {"subscription_start": now, "next_renewal_at": next_renewal(now)}
+        }[data.action]
+        result = await db.profiles.update_many(query, {"$set": {**changes, "updated_at": now}})
+        counts = {"matched": result.matched_count, "modified": result.modified_count}
+    
+    # The affected unique_links are not known without another query, so drop
+    # every cached public page of this user.
+    public_profile_cache.discard_where(lambda cached: cached[2] == user.user_id)
+    
+    return {"action": data.action, **counts}
+
+@api_router.get("/profiles/{profile_id}/stats")
+async def get_profile_stats(
+    profile_id: str,
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: Optional[Literal["hour", "day", "month"]] = None
+):
+    user = await get_user_from_token(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Non authentifié")
+    
+    owned = await db.profiles.find_one({"profile_id": profile_id, "user_id": user.user_id}, {"_id": 1})
+    if not owned:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    
+    start, end, interval = stats_range(start, end, interval)
+    stats = await tap_stats({"profile_id": profile_id, "user_id": user.user_id}, start, end, interval)
+    return FastJSONResponse({"profile_id": profile_id, **stats})
+
+@api_router.get("/stats")
+async def get_account_stats(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    interval: Optional[Literal["hour", "day", "month"]] = None
+):
+    user = await get_user_from_token(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="Non authentifié")
     
-    return {"is_archived": new_status}
+    start, end, interval = stats_range(start, end, interval)
+    return FastJSONResponse(await tap_stats({"user_id": user.user_id}, start, end, interval))
 
 @api_router.get("/profiles/{profile_id}/vcard")
 async def generate_vcard(profile_id: str, request: Request):
@@ -500,39 +1831,208 @@ async def generate_vcard(profile_id: str, request: Request):
     if not profile_doc:
         raise HTTPException(status_code=404, detail="Profil non trouvé")
     
-    vcard_lines = [
-        "BEGIN:VCARD",
-        "VERSION:3.0",
-        f"FN:{profile_doc['name']}",
-        f"TITLE:{profile_doc['job']}",
-        f"TEL;TYPE=CELL:{profile_doc['phone']}"
-    ]
-    
-    if profile_doc.get("email"):
-        vcard_lines.append(f"EMAIL:{profile_doc['email']}")
-    
-    if profile_doc.get("website"):
-        vcard_lines.append(f"URL:{profile_doc['website']}")
-    
-    if profile_doc.get("address"):
-        vcard_lines.append(f"ADR:;;{profile_doc['address']};;;;")
-    
-    vcard_lines.append("END:VCARD")
-    
-    vcard_content = "\n".join(vcard_lines)
+    profile = Profile(**coerce_dates(profile_doc, "profiles"))
+    cache_key = (profile_id, profile.updated_at)
+    cached = vcard_cache.get(cache_key)
+    if cached is None:
+        body = render_vcard(profile, str(request.base_url))
+        cached = (body, make_etag(body))
+        vcard_cache.set(cache_key, cached)
+    
+    body, etag = cached
+    headers = {
+        "ETag": etag,
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(profile.name + '.vcf')}"
+    }
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="text/vcard; charset=utf-8", headers=headers)
+
+def route_template(scope) -> str:
+    # Label by path template, never by raw path, to keep label values bounded.
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return route.path
+    return "unmatched"
+
+class MetricsMiddleware:
+    """Records latency, in-flight requests and MongoDB round trips per route,
+    and logs the queries made by requests slower than SLOW_REQUEST_SECONDS"""
     
-    vcard_path = UPLOADS_DIR / f"{profile_id}.vcf"
-    with vcard_path.open("w", encoding="utf-8") as f:
-        f.write(vcard_content)
+    def __init__(self, app):
+        self.app = app
     
-    return FileResponse(
-        vcard_path,
-        media_type="text/vcard",
-        filename=f"{profile_doc['name']}.vcf"
-    )
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        route = route_template(scope)
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        queries = []
+        token = request_queries.set(queries)
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            request_queries.reset(token)
+            HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(elapsed)
+            HTTP_REQUEST_MONGO_ROUNDTRIPS.labels(route).observe(len(queries))
+            if elapsed >= SLOW_REQUEST_SECONDS:
+                logger.warning(
+                    "Slow request %s %s -> %d in %.0f ms with %d MongoDB queries: %s",
+                    method, scope["path"], status, elapsed * 1000, len(queries),
+                    ", ".join(f"{command} {collection} {seconds * 1000:.1f} ms" for command, collection, seconds in queries)
+                )
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+tap_flush_task: Optional[asyncio.Task] = None
+maintenance_task: Optional[asyncio.Task] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global tap_flush_task, maintenance_task, pool_warmed, oauth_http, password_pool, image_pool
+    connect_db()
+    try:
+        await warm_pool()
+    except PyMongoError as exc:
+        # /readyz keeps retrying the warm-up until MongoDB answers.
+        logger.error("MongoDB pool warm-up failed: %s", exc)
+    await ensure_indexes()
+    try:
+        requeued = await requeue_variants()
+        if requeued:
+            logger.info("Requeued image variants for %d uploads", len(requeued))
+    except PyMongoError as exc:
+        logger.error("Requeueing image variants failed: %s", exc)
+    get_oauth_client()
+    tap_flush_task = asyncio.create_task(flush_taps_periodically())
+    maintenance_task = asyncio.create_task(run_maintenance_periodically())
+    
+    try:
+        yield
+    finally:
+        pool_warmed = False
+        maintenance_task.cancel()
+        tap_flush_task.cancel()
+        await asyncio.gather(maintenance_task, tap_flush_task, return_exceptions=True)
+        # Flushed before the client is closed so the last taps still land.
+        await flush_taps()
+        client.close()
+        # Reset so a later lifespan in the same process recreates them lazily.
+        if oauth_http is not None:
+            await oauth_http.aclose()
+            oauth_http = None
+        if password_pool is not None:
+            password_pool.shutdown(wait=False, cancel_futures=True)
+            password_pool = None
+        if image_pool is not None:
+            image_pool.shutdown(wait=False, cancel_futures=True)
+            image_pool = None
+
+app = FastAPI(lifespan=lifespan)
+
+# Operational endpoints stay off the public api_router: only /api paths are
+# routed to the backend from outside.
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/internal/stats", include_in_schema=False)
+async def get_internal_stats():
+    return {
+        "password_pool": {
+            "workers": PASSWORD_HASH_WORKERS,
+            "queue_limit": PASSWORD_HASH_QUEUE,
+            "in_flight": password_jobs
+        },
+        "session_cache": session_cache.stats(),
+        "public_profile_cache": public_profile_cache.stats(),
+        "vcard_cache": vcard_cache.stats(),
+        "taps": tap_counter.stats(),
+        "maintenance": maintenance_stats
+    }
+
+@app.get("/healthz", include_in_schema=False)
+async def get_healthz():
+    return {"status": "ok", "mongo_pool": pool_stats()}
+
+@app.get("/readyz", include_in_schema=False)
+async def get_readyz():
+    # Ready once the pool is warm, MongoDB answers a ping, and enough pooled
+    # connections are free to take more traffic.
+    try:
+        if pool_warmed:
+            await asyncio.wait_for(db.command("ping"), READY_PING_TIMEOUT)
+        else:
+            await asyncio.wait_for(warm_pool(), READY_PING_TIMEOUT)
+    except (PyMongoError, asyncio.TimeoutError):
+        reason = "mongo_unavailable" if pool_warmed else "warming"
+    else:
+        reason = None
+    
+    stats = pool_stats()
+    if reason is None and stats["saturation"] >= READY_MAX_POOL_SATURATION:
+        reason = "pool_saturated"
+    if reason is not None:
+        return JSONResponse(status_code=503, content={"status": "not_ready", "reason": reason, "mongo_pool": stats})
+    return {"status": "ready", "mongo_pool": stats}
+
+class UploadBodyLimit:
+    """Rejects upload request bodies over UPLOAD_BODY_MAX_BYTES before the
+    multipart parser spools them to disk: up front from Content-Length, or
+    as soon as a chunked body grows past the limit"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in UPLOAD_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > UPLOAD_BODY_MAX_BYTES:
+            response = JSONResponse(status_code=413, content={"detail": "Fichier trop volumineux"})
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def receive_within_limit():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > UPLOAD_BODY_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Fichier trop volumineux")
+            return message
+        
+        await self.app(scope, receive_within_limit, send)
 
 app.include_router(api_router)
 
+# Inside CORS, so browsers can read the 413.
+app.add_middleware(UploadBodyLimit)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -541,12 +2041,5 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+# Added last so it wraps every other middleware.
+app.add_middleware(MetricsMiddleware)
@@ -36,12 +36,21 @@ export default function Dashboard() {
   const fetchProfiles = async () => {
     setLoading(true);
     try {
-      const response = await axios.get(`${API}/profiles`, {
-        params: filterType !== 'all' ? { filter: filterType } : {},
-        withCredentials: true
-      });
-      setProfiles(response.data);
-      setFilteredProfiles(response.data);
+      const allProfiles = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(`${API}/profiles`, {
+          params: {
+            ...(filterType !== 'all' ? { filter: filterType } : {}),
+            ...(cursor ? { cursor } : {})
+          },
+          withCredentials: true
+        });
+        allProfiles.push(...response.data.profiles);
+        cursor = response.data.next_cursor;
+      } while (cursor);
+      setProfiles(allProfiles);
+      setFilteredProfiles(allProfiles);
     } catch (error) {
       toast.error('Erreur lors du chargement des profils');
     } finally {
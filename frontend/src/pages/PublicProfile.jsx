@@ -54,6 +54,10 @@ export default function PublicProfile() {
     }
   };
 
+  const photoSrc = (url) => (
+    url.includes('/api/uploads/') && !url.includes('?') ? `${url}?size=512&format=webp` : url
+  );
+
   const openPhone = () => {
     window.location.href = `tel:${profile.phone}`;
   };
@@ -114,7 +118,7 @@ export default function PublicProfile() {
               initial={{ scale: 0.8, opacity: 0 }}
               animate={{ scale: 1, opacity: 1 }}
               transition={{ duration: 0.5, delay: 0.2 }}
-              src={profile.photo_url}
+              src={photoSrc(profile.photo_url)}
               alt={profile.name}
               className="w-36 h-36 rounded-full mx-auto mb-6 object-cover border-4 border-white/40 shadow-2xl"
             />
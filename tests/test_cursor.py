@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime, timezone, timedelta
+
+import mongomock
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+CREATED = datetime(2026, 3, 1, 12, 0, 0, 123000, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trip():
+    cursor = server.encode_cursor({"created_at": CREATED, "profile_id": "profile_b"})
+    assert "=" not in cursor
+    assert server.decode_cursor(cursor) == {"$or": [
+        {"created_at": {"$gt": CREATED}},
+        {"created_at": CREATED, "profile_id": {"$gt": "profile_b"}}
+    ]}
+
+
+def test_cursor_accepts_iso_string_dates():
+    # Documents written before the BSON date migration hold ISO strings.
+    cursor = server.encode_cursor({"created_at": CREATED.isoformat(), "profile_id": "profile_b"})
+    assert server.decode_cursor(cursor)["$or"][1]["created_at"] == CREATED
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(json.dumps(["2026-03-01T12:00:00+00:00"]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps({"created_at": 1}).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(["yesterday", "profile_a"]).encode()).decode(),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        server.decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_pages_walk_ties_on_created_at():
+    # Three profiles share each timestamp, so page boundaries fall inside
+    # ties and only the profile_id tie-break keeps pages disjoint.
+    profiles = mongomock.MongoClient(tz_aware=True).db.profiles
+    profiles.insert_many([
+        {"profile_id": f"profile_{i:02d}", "user_id": "user_a", "created_at": CREATED + timedelta(seconds=i // 3)}
+        for i in reversed(range(10))
+    ])
+    
+    seen = []
+    cursor = None
+    while True:
+        query = {"user_id": "user_a"}
+        if cursor:
+            query.update(server.decode_cursor(cursor))
+        page = list(profiles.find(query).sort(server.PROFILE_SORT).limit(4 + 1))
+        seen.extend(doc["profile_id"] for doc in page[:4])
+        if len(page) <= 4:
+            break
+        cursor = server.encode_cursor(page[3])
+    
+    assert seen == [f"profile_{i:02d}" for i in range(10)]
@@ -0,0 +1,117 @@
+import gzip
+import os
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import server
+
+
+SIZE = 1000
+CONTENT = bytes(range(256)) * 3 + bytes(SIZE - 768)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, SIZE - 1)),
+    ("bytes=-100", (SIZE - 100, SIZE - 1)),
+    ("bytes=-5000", (0, SIZE - 1)),
+    ("bytes=900-5000", (900, SIZE - 1)),
+    ("BYTES = 0-0", (0, 0)),
+])
+def test_parse_byte_range(header, expected):
+    assert server.parse_byte_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["items=0-10", "bytes=0-10,20-30", "bytes=a-b", "bytes=-"])
+def test_parse_byte_range_ignored(header):
+    assert server.parse_byte_range(header, SIZE) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=50-10", "bytes=-0"])
+def test_parse_byte_range_unsatisfiable(header):
+    with pytest.raises(HTTPException) as exc_info:
+        server.parse_byte_range(header, SIZE)
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers == {"Content-Range": f"bytes */{SIZE}"}
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "UPLOADS_DIR", tmp_path)
+    (tmp_path / "photo.png").write_bytes(CONTENT)
+    return tmp_path
+
+
+@pytest.fixture
+def http(uploads):
+    # No context manager: the lifespan (and MongoDB) is not needed here.
+    return TestClient(server.app)
+
+
+def test_serve_full_file(http):
+    response = http.get("/api/uploads/photo.png")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["cache-control"] == server.UPLOAD_CACHE_CONTROL
+
+
+def test_serve_range(http):
+    response = http.get("/api/uploads/photo.png", headers={"Range": "bytes=-100"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-100:]
+    assert response.headers["content-range"] == f"bytes {SIZE - 100}-{SIZE - 1}/{SIZE}"
+    assert response.headers["content-length"] == "100"
+
+
+def test_serve_unsatisfiable_range(http):
+    response = http.get("/api/uploads/photo.png", headers={"Range": f"bytes={SIZE}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{SIZE}"
+
+
+def test_if_range(http):
+    etag = http.get("/api/uploads/photo.png").headers["etag"]
+    matching = http.get("/api/uploads/photo.png", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert matching.status_code == 206
+    assert matching.content == CONTENT[:10]
+    
+    # A stale validator means the client's partial copy is outdated: send it all.
+    stale = http.get("/api/uploads/photo.png", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
+
+
+def test_conditional_get(http, uploads):
+    first = http.get("/api/uploads/photo.png")
+    assert http.get("/api/uploads/photo.png", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert http.get("/api/uploads/photo.png", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert http.get(
+        "/api/uploads/photo.png", headers={"If-Modified-Since": first.headers["last-modified"]}
+    ).status_code == 304
+    
+    mtime = os.stat(uploads / "photo.png").st_mtime
+    os.utime(uploads / "photo.png", (mtime + 60, mtime + 60))
+    assert http.get("/api/uploads/photo.png", headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+
+
+def test_precompressed_sibling(http, uploads):
+    (uploads / "photo.png.gz").write_bytes(gzip.compress(CONTENT))
+    compressed = http.get("/api/uploads/photo.png", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.content == CONTENT
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    
+    identity = http.get("/api/uploads/photo.png", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in identity.headers
+    assert identity.content == CONTENT
+
+
+@pytest.mark.parametrize("file_id", ["missing.png", ".upload-1.tmp", "page.html"])
+def test_not_served(http, uploads, file_id):
+    (uploads / "page.html").write_text("<script></script>")
+    assert http.get(f"/api/uploads/{file_id}").status_code == 404
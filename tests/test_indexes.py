@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import manage
+import server
+
+
+NOW = datetime(2026, 5, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = AsyncMongoMockClient()["test_database"]
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+
+def seed_duplicate_sessions(db):
+    asyncio.run(db.user_sessions.insert_many([
+        {"session_token": "repeated", "user_id": "user_a", "expires_at": NOW},
+        {"session_token": "repeated", "user_id": "user_a", "expires_at": NOW + timedelta(days=7)},
+        {"session_token": "repeated", "user_id": "user_a", "expires_at": NOW + timedelta(days=3)},
+        {"session_token": "single", "user_id": "user_b", "expires_at": NOW}
+    ]))
+
+
+def index_names(db, collection: str) -> set:
+    return set(asyncio.run(db[collection].index_information()))
+
+
+def test_failed_index_does_not_block_the_others(db):
+    seed_duplicate_sessions(db)
+    
+    assert asyncio.run(server.ensure_indexes()) == [("user_sessions", "session_token_unique")]
+    assert "expires_at_ttl" in index_names(db, "user_sessions")
+    assert "user_id_created_at" in index_names(db, "profiles")
+
+
+def test_dedupe_sessions_keeps_latest_expiry(db):
+    seed_duplicate_sessions(db)
+    
+    asyncio.run(manage.dedupe_sessions_command(argparse.Namespace(dry_run=True)))
+    assert asyncio.run(db.user_sessions.count_documents({})) == 4
+    
+    asyncio.run(manage.dedupe_sessions_command(argparse.Namespace(dry_run=False)))
+    remaining = asyncio.run(db.user_sessions.find({}, {"_id": 0, "session_token": 1, "expires_at": 1}).to_list(None))
+    assert sorted((doc["session_token"], doc["expires_at"].day) for doc in remaining) == [("repeated", 8), ("single", 1)]
+    assert asyncio.run(server.ensure_indexes()) == []
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+OLD = time.time() - 2 * 24 * 60 * 60
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "UPLOADS_DIR", tmp_path)
+    monkeypatch.setattr(server, "db", AsyncMongoMockClient()["test_database"])
+    monkeypatch.setattr(server, "SWEEP_BATCH_PAUSE", 0)
+    monkeypatch.setattr(server, "maintenance_stats", dict(server.maintenance_stats, runs=0, errors=0))
+    return tmp_path
+
+
+def write(directory, name: str, mtime: float = OLD):
+    path = directory / name
+    path.write_bytes(b"x" * 10)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_sweep_keeps_referenced_and_fresh_roots(uploads):
+    write(uploads, "referenced.png")
+    write(uploads, "referenced-128.webp")
+    write(uploads, "orphan.png")
+    write(uploads, "orphan-128.webp")
+    # A re-upload touched the original; its older variants must stay too.
+    write(uploads, "reuploaded.png", time.time())
+    write(uploads, "reuploaded-128.webp")
+    asyncio.run(server.db.profiles.insert_one({"photo_url": "/api/uploads/referenced.png"}))
+    
+    assert asyncio.run(server.sweep_orphaned_uploads()) == 2
+    assert sorted(p.name for p in uploads.iterdir()) == [
+        "referenced-128.webp", "referenced.png", "reuploaded-128.webp", "reuploaded.png"
+    ]
+    assert server.maintenance_stats["bytes_reclaimed"] >= 20
+
+
+def test_remove_stale_uploads_rechecks_mtime(uploads):
+    write(uploads, "photo.png")
+    write(uploads, "photo-128.webp")
+    cutoff = time.time() - 60
+    os.utime(uploads / "photo.png")
+    
+    assert server.remove_stale_uploads(["photo-128.webp", "photo.png"], cutoff) is None
+    assert (uploads / "photo.png").exists() and (uploads / "photo-128.webp").exists()
+    assert server.remove_stale_uploads(["gone.png"], cutoff) == 0
+
+
+def test_maintenance_survives_file_errors(uploads, monkeypatch):
+    def failing():
+        raise FileNotFoundError("renamed mid-sweep")
+    monkeypatch.setattr(server, "list_upload_files", failing)
+    
+    asyncio.run(server.run_maintenance())
+    assert server.maintenance_stats["runs"] == 1
+    assert server.maintenance_stats["errors"] == 1
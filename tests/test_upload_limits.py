@@ -0,0 +1,32 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.fixture
+def http(monkeypatch):
+    monkeypatch.setattr(server, "UPLOAD_BODY_MAX_BYTES", 1024)
+    return TestClient(server.app)
+
+
+def test_oversized_upload_rejected_from_content_length(http):
+    response = http.post("/api/upload", files={"file": ("photo.png", b"\x89PNG\r\n\x1a\n" + bytes(4096), "image/png")})
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Fichier trop volumineux"}
+
+
+def test_oversized_chunked_upload_rejected_while_reading(http):
+    def body():
+        for _ in range(64):
+            yield bytes(256)
+    
+    response = http.post("/api/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert response.status_code == 413
+    assert "content-length" not in response.request.headers
+
+
+def test_limit_only_applies_to_upload_paths(http):
+    # The import endpoint streams large CSV files and has its own limits.
+    response = http.post("/api/profiles/import", files={"file": ("rows.csv", bytes(4096), "text/csv")})
+    assert response.status_code == 401
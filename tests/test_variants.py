@@ -0,0 +1,73 @@
+import asyncio
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from PIL import Image
+
+import server
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), (200, 10, 10)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def queued(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "UPLOADS_DIR", tmp_path)
+    monkeypatch.setattr(server, "db", AsyncMongoMockClient()["test_database"])
+    calls = []
+    monkeypatch.setattr(server, "enqueue_variants", lambda sha256, file_id: calls.append(file_id))
+    return calls
+
+
+def upload(http):
+    response = http.post("/api/upload", files={"file": ("photo.png", png_bytes(), "image/png")})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("status, requeued", [("pending", True), ("failed", True), ("ready", False)])
+def test_reupload_retries_unfinished_variants(queued, status, requeued):
+    http = TestClient(server.app)
+    first = upload(http)
+    assert queued == [f"{first['sha256']}.png"]
+    
+    asyncio.run(server.db.uploads.update_one({"sha256": first["sha256"]}, {"$set": {"variants_status": status}}))
+    upload(http)
+    assert len(queued) == (2 if requeued else 1)
+
+
+def test_requeue_variants_selects_by_status(queued):
+    asyncio.run(server.db.uploads.insert_many([
+        {"sha256": "a", "file_id": "a.png", "variants_status": "pending"},
+        {"sha256": "b", "file_id": "b.png", "variants_status": "failed"},
+        {"sha256": "c", "file_id": "c.png", "variants_status": "ready"},
+        {"sha256": "d", "file_id": "d.png"}
+    ]))
+    
+    assert sorted(asyncio.run(server.requeue_variants())) == ["a", "d"]
+    assert sorted(asyncio.run(server.requeue_variants(("pending", "failed", None)))) == ["a", "b", "d"]
+    assert sorted(queued) == ["a.png", "a.png", "b.png", "d.png", "d.png"]
+
+
+def test_enqueue_skips_uploads_already_rendering(monkeypatch):
+    rendered = []
+    
+    async def generate_variants(sha256, file_id):
+        rendered.append(file_id)
+    
+    monkeypatch.setattr(server, "generate_variants", generate_variants)
+    
+    async def enqueue_twice():
+        server.enqueue_variants("a", "a.png")
+        server.enqueue_variants("a", "a.png")
+        await asyncio.gather(*list(server.variant_tasks))
+        server.enqueue_variants("a", "a.png")
+        await asyncio.gather(*list(server.variant_tasks))
+    
+    asyncio.run(enqueue_twice())
+    assert rendered == ["a.png", "a.png"]
@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+
+def physical_lines(folded: str) -> list:
+    return folded.split("\r\n")
+
+
+def unfold(folded: str) -> str:
+    return folded.replace("\r\n ", "")
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Dupont; Fils, Cie", "Dupont\\; Fils\\, Cie"),
+    ("C:\\chemin", "C:\\\\chemin"),
+    ("1 rue\r\n75001\nParis\rFrance", "1 rue\\n75001\\nParis\\nFrance"),
+    ("Simple", "Simple"),
+])
+def test_vcard_escape(value, expected):
+    assert server.vcard_escape(value) == expected
+
+
+def test_vcard_fold_short_line_untouched():
+    line = "FN:" + "a" * 72
+    assert server.vcard_fold(line) == line
+
+
+def test_vcard_fold_ascii():
+    line = "NOTE:" + "x" * 200
+    folded = server.vcard_fold(line)
+    parts = physical_lines(folded)
+    assert [len(part.encode()) for part in parts] == [75, 75, 57]
+    assert all(part.startswith(" ") for part in parts[1:])
+    assert unfold(folded) == line
+
+
+@pytest.mark.parametrize("char", ["é", "€", "😀"])
+def test_vcard_fold_never_splits_utf8(char):
+    line = "FN:" + char * 80
+    folded = server.vcard_fold(line)
+    for part in physical_lines(folded):
+        assert len(part.encode("utf-8")) <= 75
+        part.encode("utf-8").decode("utf-8")
+    assert unfold(folded) == line
+
+
+def test_render_vcard():
+    updated = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    profile = server.Profile(
+        profile_id="profile_1",
+        name="Émilie Dupont, Jr",
+        job="Directrice; ventes",
+        phone="+33 6 12 34 56 78",
+        whatsapp="+33 6 12 34 56 78",
+        instagram="@emilie",
+        linkedin="emilie-dupont",
+        photo_url="/api/uploads/abc.png",
+        unique_link="emilie-dupont-0000abcd",
+        subscription_start=updated,
+        created_at=updated,
+        updated_at=updated
+    )
+    body = server.render_vcard(profile, "https://cards.example.com/")
+    text = body.decode("utf-8")
+    
+    assert text.startswith("BEGIN:VCARD\r\nVERSION:3.0\r\n")
+    assert text.endswith("END:VCARD\r\n")
+    assert all(len(line.encode()) <= 75 for line in text.split("\r\n"))
+    lines = unfold(text).split("\r\n")
+    assert "FN:Émilie Dupont\\, Jr" in lines
+    assert "TITLE:Directrice\\; ventes" in lines
+    assert "X-SOCIALPROFILE;TYPE=whatsapp:https://wa.me/33612345678" in lines
+    assert "X-SOCIALPROFILE;TYPE=instagram:https://instagram.com/emilie" in lines
+    assert "X-SOCIALPROFILE;TYPE=linkedin:https://linkedin.com/in/emilie-dupont" in lines
+    assert "PHOTO;VALUE=URI:https://cards.example.com/api/uploads/abc.png" in lines
+    assert "REV:20260102T030405Z" in lines
+    assert not any(line.startswith(("URL:", "ADR", "X-SOCIALPROFILE;TYPE=facebook")) for line in lines)